@@ -0,0 +1,43 @@
+# Analysis pipeline of the College Scorecard and related datasets. The modules are layered from reading the
+# raw data up to the figures and the command line:
+#   config          - folders, formats and other settings, changed at run time through scorecard.config
+#   instrumentation - timing and memory records of the stages of the pipeline
+#   cache           - the Parquet cache of parsed source files, file locks and worker pools
+#   sources         - the FRED series and other registered source datasets
+#   panel           - typed reads of the yearly Scorecard datasets
+#   store           - the column store and the aggregate cube built on it
+#   aggregate       - aggregation by state and correlations
+#   datasets        - the derived datasets in the Visualization Datasets folder
+#   analysis        - the jobs that write the derived datasets
+#   plots           - the figures, and rendering them in batch mode
+#   benchmark       - benchmarks on synthetic data
+#   artifacts       - incremental builds of the derived datasets and figures
+#   cli             - the command line
+# Every public function is re-exported here, so "from scorecard import *" gives the whole analysis
+import warnings
+
+from . import config
+from .config import states
+from .instrumentation import LogSink, JsonLinesSink, MemorySink, setInstrumentationSink, stage, instrumented
+from .cache import scorecardFiles, cacheCollegeScorecardDatasets
+from .sources import (readFREDdata, SOURCE_FOLDERS, FRONT_MATTER_SHEETS, SOURCE_LAYOUTS, sourceCatalog,
+                      registerSource, listSources, loadSource)
+from .panel import (scorecardDtypes, IDENTIFIERS, ScorecardPanel, scorecardPanel, readCollegeScorecardDatasets,
+                    STREAM_CHUNKSIZE, streamCollegeScorecardDatasets, InstitutionIndex, buildInstitutionIndex)
+from .store import ColumnStore, buildColumnStore, CUBE_STATS, AggregateCube, buildAggregateCube
+from .aggregate import (queryStateStatistics, aggregateByState, streamAggregateByState, CorrelationAccumulator,
+                        correlateAttributes)
+from .datasets import OUTPUT_WRITERS, datasetPath, writeDataset, readDataset
+from .analysis import (getSchoolCounts, transformAttrsToStateLevel, profileNulls, generateNullCountTables,
+                       countInstOverTime)
+from .plots import (computeTicks, SCATTER_MAX_POINTS, meanInterval, regressionBand, plotAttributeTimeSeries,
+                    barChartCollegeScorecardData, assignBins, boxPlotBlackInst,
+                    generateStackedBarChartOneYearAttributesNullCount,
+                    timeSeriesNullPercentageForMultiYearAttributes, generateCorrelationMatrix, loadStateGeometry,
+                    generateGeoPlot, createIntroVizz, createRaceVCompletionScatterPlots, histogramGenerator,
+                    DEFAULT_FIGURES, renderFigures)
+from .benchmark import generateSyntheticScorecard, benchmarkPipeline, compareBenchmarks
+from .artifacts import ARTIFACTS, buildArtifacts
+from .cli import main
+
+warnings.simplefilter("ignore")
@@ -0,0 +1,6 @@
+# Runs a job of the pipeline with python -m scorecard
+import sys
+
+from .cli import main
+
+sys.exit(main())
@@ -0,0 +1,296 @@
+# Aggregation of the institutional data by state, and correlations between attributes
+
+import pandas as pd
+import numpy as np
+
+from .config import states
+from .instrumentation import instrumented
+from .cache import scorecardFiles, _mapParallel
+from .panel import readCollegeScorecardDatasets, streamCollegeScorecardDatasets
+from .store import buildAggregateCube, _aggregateCubeHolds
+
+
+# Computes statistics of attributes by state from the aggregate cube when it already holds them. Otherwise a
+# query restricted to some years only reads the datasets of those years and aggregates them directly, since
+# building the cube would read every year, and any other query builds the cube
+def queryStateStatistics(attrs, stats="mean", byYear=True, years=None, wide=False, useCache=True):
+    """
+    Computes statistics of attributes for every state, in the layout of aggregateByState
+    @ params
+    attrs    - Required - An attribute name or list of attribute names
+    stats    - Optional - A statistic name or list of statistic names supported by both AggregateCube.query
+                          and aggregateByState
+    byYear   - Optional - Whether to group by year as well as by state
+    years    - Optional - A year or list of years to include. Defaults to every year
+    wide     - Optional - Return one column per attribute (and statistic) instead of a tidy dataframe
+    useCache - Optional - Whether yearly datasets may be read from the Parquet cache
+    """
+    if not isinstance(attrs, list):
+        attrs = [attrs]
+    if years is not None and not isinstance(years, list):
+        years = [years]
+
+    if years is None or _aggregateCubeHolds(attrs):
+        return buildAggregateCube(attrs, useCache).query(attrs, stats, byYear=byYear, years=years, wide=wide)
+    data = readCollegeScorecardDatasets(attrs, useCache=useCache, years=years)
+    return aggregateByState(data, attrs, stats, byYear, wide)
+
+
+# Aggregates the institutional data by state (and optionally year) in a single groupby pass. Besides the
+# statistics pandas supports by name (mean, median, count, min, max, ...), "size" gives the number of
+# institutions, "nulls" the number of missing values for an attribute and "nullPercent" the share of the
+# institutions whose value is missing
+@instrumented("aggregate")
+def aggregateByState(data, attrs, stats="mean", byYear=True, wide=False):
+    """
+    Computes statistics of attributes for every state and year
+    @ params
+    data   - Required - A dataframe returned by readCollegeScorecardDatasets
+    attrs  - Required - An attribute name or list of attribute names
+    stats  - Optional - A statistic name or list of statistic names
+    byYear - Optional - Whether to group by year as well as by state
+    wide   - Optional - Return one column per attribute (and statistic) indexed by state and year, instead
+                        of a tidy dataframe with one row per state, year and attribute
+    """
+    if not isinstance(attrs, list):
+        attrs = [attrs]
+    if not isinstance(stats, list):
+        stats = [stats]
+
+    keys = ["STABBR", "Year"] if byYear else ["STABBR"]
+    grouped = data.groupby(keys, observed=True)
+
+    # The non-null count is always computed since the null count is derived from it
+    funcs = [stat for stat in stats if stat not in ["size", "nulls", "nullPercent"]]
+    if "count" not in funcs:
+        funcs.append("count")
+    result = grouped[attrs].agg(funcs)
+
+    sizes = grouped.size()
+    for attr in attrs:
+        result[(attr, "size")] = sizes
+        result[(attr, "nulls")] = sizes - result[(attr, "count")]
+        result[(attr, "nullPercent")] = result[(attr, "nulls")] / sizes
+    result = result[[(attr, stat) for attr in attrs for stat in stats]]
+
+    years = sorted(data["Year"].unique()) if byYear else None
+    return _shapeStateAggregate(result, attrs, stats, years, wide)
+
+
+# Arranges grouped statistics, with (attribute, statistic) columns indexed by state or by state and year,
+# into the layout returned by aggregateByState
+def _shapeStateAggregate(result, attrs, stats, years, wide):
+    # Every state (and year) appears in the result, even when it has no institutions
+    if years is not None:
+        index = pd.MultiIndex.from_product([states, years], names=["State", "Year"])
+    else:
+        index = pd.Index(states, name="State")
+    result.index.names = index.names
+    # When every state and year is present the reindex keeps the categorical labels of the groupby, so the
+    # plain labels are set explicitly
+    result = result.reindex(index).set_axis(index)
+
+    # Counts for states without institutions are zero rather than missing, and every other statistic is a
+    # plain float regardless of the compact type of the attribute
+    counts = [(attr, stat) for attr in attrs for stat in stats if stat in ["size", "nulls", "count"]]
+    others = [column for column in result.columns if column not in counts]
+    result[counts] = result[counts].fillna(0).astype(int)
+    result[others] = result[others].astype("float64")
+
+    if wide:
+        if len(stats) == 1:
+            result.columns = result.columns.droplevel(1)
+        return result
+
+    # Stack the attributes into rows so that each row holds the statistics of one attribute
+    tidy = pd.concat({attr: result[attr] for attr in attrs}, names=["Attribute"])
+    return tidy.reset_index()
+
+
+# Aggregates the institutional data by state (and optionally year) while streaming it in chunks, so the full
+# panel is never held in memory. Only statistics that can be combined across chunks are supported: sum,
+# count, size, nulls, mean, min and max
+@instrumented("aggregate")
+def streamAggregateByState(keyAttributes, stats="mean", byYear=True, wide=False, **streamOptions):
+    """
+    Computes the same result as aggregateByState without loading the whole panel
+    @ params
+    keyAttributes - Required - An attribute name or list of attribute names
+    stats         - Optional - A statistic name or list of statistic names
+    byYear        - Optional - Whether to group by year as well as by state
+    wide          - Optional - Return a wide dataframe instead of a tidy one
+    streamOptions - Optional - Passed on to streamCollegeScorecardDatasets
+    """
+    if not isinstance(keyAttributes, list):
+        keyAttributes = [keyAttributes]
+    if not isinstance(stats, list):
+        stats = [stats]
+
+    unsupported = [stat for stat in stats if stat not in ["sum", "count", "size", "nulls", "mean", "min", "max"]]
+    if unsupported:
+        raise ValueError(f"Statistics {unsupported} cannot be computed while streaming")
+
+    # Partial results of each chunk. These are small (one row per state and year), so keeping them is cheap
+    keys = ["STABBR", "Year"] if byYear else ["STABBR"]
+    funcs = ["sum", "count"] + [stat for stat in ["min", "max"] if stat in stats]
+    partials = []
+    years = []
+    for chunk in streamCollegeScorecardDatasets(keyAttributes, **streamOptions):
+        grouped = chunk.groupby(keys, observed=True)
+        partial = grouped[keyAttributes].agg(funcs)
+        sizes = grouped.size()
+        for attr in keyAttributes:
+            partial[(attr, "size")] = sizes
+        partials.append(partial)
+        years = list(chunk["Year"].cat.categories)
+
+    # Combine the partial results of all chunks
+    combined = pd.concat(partials)
+    levels = list(range(len(keys)))
+    grouped = combined.groupby(level=levels)
+    result = grouped.sum()
+    for attr in keyAttributes:
+        for stat in ["min", "max"]:
+            if stat in stats:
+                result[(attr, stat)] = grouped[[(attr, stat)]].agg(stat)[(attr, stat)]
+        result[(attr, "nulls")] = result[(attr, "size")] - result[(attr, "count")]
+        result[(attr, "mean")] = result[(attr, "sum")] / result[(attr, "count")]
+    result = result[[(attr, stat) for attr in keyAttributes for stat in stats]]
+
+    # Only keep the years that actually contain institutions
+    if byYear:
+        present = set(result.index.get_level_values(1))
+        years = [year for year in years if year in present]
+    return _shapeStateAggregate(result, keyAttributes, stats, years if byYear else None, wide)
+
+
+# Accumulates the sufficient statistics of the pairwise-complete covariance and correlation of a set of
+# attributes. For every pair of attributes it keeps the number of rows where both are present, and the sums
+# of each attribute, its squares and their products over those rows, so rows are only excluded from the
+# pairs they are missing a value for. Values are shifted by a reference value per attribute before they are
+# summed, which keeps the sums accurate when an attribute's mean is large compared to its spread.
+# Accumulators of separate chunks or years can be merged
+class CorrelationAccumulator:
+    def __init__(self, attrs):
+        self.attrs = list(attrs)
+        size = len(self.attrs)
+        self.shift = None
+        # n[i, j] counts the rows where attributes i and j are both present. sx[i, j] and sxx[i, j] sum the
+        # shifted values of attribute i and their squares over those rows, and sxy[i, j] sums the products
+        self.n = np.zeros((size, size))
+        self.sx = np.zeros((size, size))
+        self.sxx = np.zeros((size, size))
+        self.sxy = np.zeros((size, size))
+
+    # Adds a chunk of rows, given as a dataframe containing the attributes. Missing values are skipped
+    def update(self, data):
+        values = data[self.attrs].astype("float64").to_numpy(na_value=np.nan)
+        present = ~np.isnan(values)
+        if self.shift is None:
+            counts = present.sum(axis=0)
+            self.shift = np.where(counts > 0, np.nansum(values, axis=0) / np.maximum(counts, 1), 0.0)
+
+        shifted = np.where(present, values - self.shift, 0.0)
+        mask = present.astype("float64")
+        self.n += mask.T @ mask
+        self.sx += shifted.T @ mask
+        self.sxx += (shifted * shifted).T @ mask
+        self.sxy += shifted.T @ shifted
+        return self
+
+    # Moves the sums to a different reference value per attribute
+    def _reshift(self, shift):
+        delta = (self.shift - shift)[:, None]
+        self.sxy += delta * self.sx.T + delta.T * self.sx + delta * delta.T * self.n
+        self.sxx += 2 * delta * self.sx + delta * delta * self.n
+        self.sx += delta * self.n
+        self.shift = shift
+
+    # Adds the statistics of another accumulator of the same attributes
+    def merge(self, other):
+        if other.attrs != self.attrs:
+            raise ValueError("Only accumulators of the same attributes can be merged")
+        if other.shift is None:
+            return self
+        if self.shift is None:
+            self.shift = other.shift.copy()
+        elif not np.array_equal(self.shift, other.shift):
+            other = other._copy()
+            other._reshift(self.shift)
+        self.n += other.n
+        self.sx += other.sx
+        self.sxx += other.sxx
+        self.sxy += other.sxy
+        return self
+
+    def _copy(self):
+        copy = CorrelationAccumulator(self.attrs)
+        copy.shift = None if self.shift is None else self.shift.copy()
+        copy.n, copy.sx, copy.sxx, copy.sxy = self.n.copy(), self.sx.copy(), self.sxx.copy(), self.sxy.copy()
+        return copy
+
+    # Number of rows where both attributes of each pair are present
+    def counts(self):
+        return pd.DataFrame(self.n.astype(int), index=self.attrs, columns=self.attrs)
+
+    # Pairwise-complete covariance matrix. Pairs with fewer than ddof + 1 rows are missing
+    def covariance(self, ddof=1):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            products = self.sxy - self.sx * self.sx.T / self.n
+            cov = np.where(self.n > ddof, products / (self.n - ddof), np.nan)
+        return pd.DataFrame(cov, index=self.attrs, columns=self.attrs)
+
+    # Pairwise-complete Pearson correlation matrix, matching DataFrame.corr(). Pairs with fewer than
+    # minPeriods rows, or where either attribute is constant, are missing
+    def correlation(self, minPeriods=2):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            products = self.sxy - self.sx * self.sx.T / self.n
+            squares = self.sxx - self.sx * self.sx / self.n
+            corr = products / np.sqrt(squares * squares.T)
+        corr = np.where(self.n >= minPeriods, np.clip(corr, -1, 1), np.nan)
+        return pd.DataFrame(corr, index=self.attrs, columns=self.attrs)
+
+
+# Accumulates the correlation statistics of a single year of institutions, streaming it in chunks
+def _accumulateYear(attrs, year, streamOptions):
+    accumulator = CorrelationAccumulator(attrs)
+    for chunk in streamCollegeScorecardDatasets(attrs, years=[year], **streamOptions):
+        accumulator.update(chunk)
+    return accumulator
+
+
+# Computes the pairwise-complete correlation (or covariance) of attributes in one streaming pass. At the
+# institution level each institution is an observation, and the years are accumulated separately, in
+# parallel when workers are given, then merged. At the state level each state's mean of every attribute is
+# an observation
+@instrumented("correlate")
+def correlateAttributes(keyAttributes, level="institution", method="correlation", workers=None, years=None,
+                        **streamOptions):
+    """
+    Returns the correlation or covariance matrix of the attributes as a dataframe
+    @ params
+    keyAttributes - Required - A list of attribute names
+    level         - Optional - "institution" or "state"
+    method        - Optional - "correlation", "covariance" or "counts", the number of observations of each pair
+    workers       - Optional - Number of processes the years are accumulated across
+    years         - Optional - A year or list of years to include. Defaults to every year
+    streamOptions - Optional - Passed on to streamCollegeScorecardDatasets
+    """
+    if method not in ["correlation", "covariance", "counts"]:
+        raise ValueError(f"Unknown method {method}")
+
+    if level == "state":
+        means = streamAggregateByState(keyAttributes, "mean", byYear=False, wide=True, years=years,
+                                       **streamOptions)
+        accumulator = CorrelationAccumulator(keyAttributes).update(means)
+    elif level == "institution":
+        yearList = list(scorecardFiles(years=years).keys())
+        partials = _mapParallel(_accumulateYear, [keyAttributes] * len(yearList), yearList,
+                                [streamOptions] * len(yearList), workers=workers)
+        accumulator = CorrelationAccumulator(keyAttributes)
+        for partial in partials:
+            accumulator.merge(partial)
+    else:
+        raise ValueError(f"Unknown level {level}")
+
+    return getattr(accumulator, method)()
@@ -0,0 +1,104 @@
+# The derived datasets of the analysis: state averages, null profiles and institution counts
+
+from .store import buildAggregateCube
+from .aggregate import queryStateStatistics
+from .datasets import writeDataset
+
+
+# Determines how many institutions are in a state in a given year
+def getSchoolCounts(year):
+    # Count the institutions in every state in the year, from the aggregate cube if it is built. The attribute
+    # doesn't matter since we are only interested in the counts of each state in a particular year
+    sizes = queryStateStatistics("PBI", "size", byYear=False, years=[year])
+    # Store the counts of the states with institutions in a dictionary. Keys are the state abbrevation and
+    # value is the count
+    counts = {state: size for state, size in zip(sizes["State"], sizes["size"]) if size > 0}
+    # Sort the state abbreviations by the count in descending order
+    counts = dict(sorted(counts.items(), key=lambda item: item[1], reverse=True))
+
+    # Return the dictionary
+    return counts
+
+
+# Aggregates the institutional data on a state level
+def transformAttrsToStateLevel(attrs, name, year, save=True):
+    if not isinstance(attrs, list):
+        attrs = [attrs]
+    # Average each attribute across the institutions in every state in the year of interest, ignoring null
+    # values
+    saveVal = queryStateStatistics(attrs, "mean", byYear=False, years=[year], wide=True).reset_index()
+
+    # Either save the dataframe as a dataset, or return the dataframe
+    if save:
+        writeDataset(name, saveVal)
+    else:
+        return saveVal
+
+
+# Profiles the missing values of attributes for every state and year in a single pass. Each row of the
+# result holds the null count, institution count and null percent of one attribute in one state and year
+def profileNulls(attrs, years=None, name=None, useCache=True):
+    """
+    Computes null counts and null percentages by attribute, state and year
+    @ params
+    attrs    - Required - An attribute name or list of attribute names
+    years    - Optional - A year or list of years to profile. Defaults to every year
+    name     - Optional - Name of a dataset the profile is also written to
+    useCache - Optional - Whether yearly datasets may be read from the Parquet cache
+    """
+    if not isinstance(attrs, list):
+        attrs = [attrs]
+
+    # Count the nulls and institutions of every state and year, from the aggregate cube if it is built, and
+    # express the nulls as a percent of the institutions in that state and year
+    profile = queryStateStatistics(attrs, ["nulls", "size", "nullPercent"], years=years, useCache=useCache)
+    profile.rename(columns={"nulls": "Null Count", "size": "Institution Count", "nullPercent": "Null Percent"},
+                   inplace=True)
+
+    if name is not None:
+        writeDataset(name, profile)
+
+    return profile
+
+
+# Counts how many null values there are for both single year attributes and multiyear attributes, and what
+# percent of the institutions in each state and year they make up. The counts are saved to the "Sheet1"
+# sheet and the percentages to the "Percent" sheet of each dataset
+def generateNullCountTables(useCache=True):
+    # CDR3 data uses the data gathered in year 2013, although it refers to the 2011 fiscal year CDR cohort
+    # Null values for TUITIONFEE_IN and TUITIONFEE_OUT are collected over time
+    # C150_4_* comes from the data gathered in year 2013
+    # Null values for UGDS_* are collected over time
+    oneYearOnly = ["CDR3",
+                   "C150_4_WHITE", "C150_4_BLACK", "C150_4_HISP", "C150_4_ASIAN", "C150_4_NHPI",
+                   "C150_4_NRA", "C150_4_UNKN"]
+    YEAR = 2013
+
+    multiYear = ["TUITIONFEE_IN", "TUITIONFEE_OUT", "UGDS_WHITE", "UGDS_BLACK", "UGDS_HISP", "UGDS_ASIAN"]
+
+    # Profile the nulls of the single year attributes in the year they come from, and of the multiyear
+    # attributes in every year
+    oneYear = profileNulls(oneYearOnly, years=[YEAR], useCache=useCache)
+    profile = profileNulls(multiYear, useCache=useCache)
+
+    # Single year attributes are tabulated by state and attribute
+    writeDataset("One Year Attributes Null Counts",
+                 {sheet: oneYear.pivot(index="State", columns="Attribute", values=column)[oneYearOnly]
+                  for column, sheet in [("Null Count", "Sheet1"), ("Null Percent", "Percent")]})
+
+    # Multiyear attributes are tabulated by state and year, with one dataset per attribute
+    for attr in multiYear:
+        sub = profile[profile["Attribute"] == attr]
+        writeDataset(f"{attr} Null Counts Over Time",
+                     {sheet: sub.pivot(index="State", columns="Year", values=column)
+                      for column, sheet in [("Null Count", "Sheet1"), ("Null Percent", "Percent")]})
+
+
+# Counts the number of institutions over time
+def countInstOverTime(useCache=True):
+    # Look up the number of institutions in every state and year, from 1996 to 2013, in the aggregate cube,
+    # with one column per year. States without any institutions in a year are counted as 0
+    saveVal = buildAggregateCube(["PBI"], useCache).query("PBI", "size", wide=True)["PBI"].unstack("Year")
+
+    # Save the results as a dataset
+    writeDataset("instiution count data", {"Sheet1": saveVal})
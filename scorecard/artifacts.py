@@ -0,0 +1,165 @@
+# Incremental builds of the derived datasets and figures
+
+import os
+import json
+import hashlib
+
+from . import config
+from .cache import scorecardFiles, _fileSignature, _fileHash
+from .datasets import datasetPath
+from .analysis import transformAttrsToStateLevel, generateNullCountTables, countInstOverTime
+from .plots import _figureSpec, renderFigures
+
+
+# The derived datasets and figures of the project, with what each one is built from. Every artifact names
+# the function (and arguments) that builds it, the files and datasets it writes, the yearly Scorecard datasets and other
+# files it reads, and the artifacts whose outputs it reads. buildArtifacts uses this to only rebuild the
+# artifacts that are stale
+ARTIFACTS = {
+    "institution counts": {
+        "function": "countInstOverTime", "args": [],
+        "outputs": [], "datasets": [("instiution count data", "Sheet1")],
+        "scorecardYears": None, "files": [], "dependsOn": [],
+    },
+    "null counts": {
+        "function": "generateNullCountTables", "args": [],
+        "outputs": [],
+        "datasets": [(name, sheet) for name in ["One Year Attributes Null Counts"] +
+                     [f"{attr} Null Counts Over Time" for attr in ["TUITIONFEE_IN", "TUITIONFEE_OUT", "UGDS_WHITE",
+                                                                   "UGDS_BLACK", "UGDS_HISP", "UGDS_ASIAN"]]
+                     for sheet in ["Sheet1", "Percent"]],
+        "scorecardYears": None, "files": [], "dependsOn": [],
+    },
+    "in and out tuition fees": {
+        "function": "transformAttrsToStateLevel", "args": [["TUITIONFEE_IN", "TUITIONFEE_OUT"],
+                                                           "in and out tuition fees", 2013],
+        "outputs": [], "datasets": [("in and out tuition fees", "main")],
+        "scorecardYears": [2013], "files": [], "dependsOn": [],
+    },
+    "black inst and default rate": {
+        "function": "transformAttrsToStateLevel", "args": [["PBI", "CDR3"], "black inst and default rate", 2013],
+        "outputs": [], "datasets": [("black inst and default rate", "main")],
+        "scorecardYears": [2013], "files": [], "dependsOn": [],
+    },
+    "one year attributes null count percent": {
+        "function": "renderFigures", "args": [[_figureSpec("one year attributes null count percent")]],
+        "outputs": [os.path.join("Figures", "one year attributes null count percent.png")], "datasets": [],
+        "scorecardYears": [], "files": [], "dependsOn": ["institution counts", "null counts"],
+    },
+    "multi year attributes null count percent over time": {
+        "function": "renderFigures", "args": [[_figureSpec("multi year attributes null count percent over time")]],
+        "outputs": [os.path.join("Figures", "multi year attributes null count percent over time.png")],
+        "datasets": [],
+        "scorecardYears": [], "files": [], "dependsOn": ["institution counts", "null counts"],
+    },
+}
+
+
+# The functions artifacts are built with, by the name ARTIFACTS refers to them by
+ARTIFACT_BUILDERS = {func.__name__: func for func in [countInstOverTime, generateNullCountTables,
+                                                      transformAttrsToStateLevel, renderFigures]}
+
+
+# Paths of every file an artifact writes. Datasets are stored in OUTPUT_FORMAT, so their paths are only
+# resolved when the artifacts are built
+def _artifactOutputs(name):
+    artifact = ARTIFACTS[name]
+    return list(dict.fromkeys(artifact["outputs"] + [datasetPath(dataset, sheet)
+                                                     for dataset, sheet in artifact["datasets"]]))
+
+
+# Path of the file recording the state of every artifact the last time it was built
+def _artifactStatePath():
+    return os.path.join(config.CACHE_FOLDER, "artifacts.json")
+
+
+# Hashes the contents of a file. Hashes are remembered in state alongside the file's size and modification
+# time, so a file is only read again once it has changed
+def _contentHash(path, state):
+    signature = _fileSignature(path)
+    known = state["files"].get(path)
+    if known is not None and known["size"] == signature["size"] and known["mtime"] == signature["mtime"]:
+        return known["sha1"]
+
+    signature["sha1"] = _fileHash(path)
+    state["files"][path] = signature
+    return signature["sha1"]
+
+
+# Computes the key of an artifact from its function, arguments, and the contents of everything it reads.
+# The artifact is stale whenever its key differs from the key it was last built with
+def _artifactKey(name, state):
+    artifact = ARTIFACTS[name]
+    inputs = [artifact["function"], json.dumps(artifact["args"], sort_keys=True, default=str)]
+
+    years = artifact["scorecardYears"]
+    if years != []:
+        inputs += [_contentHash(path, state) for path in scorecardFiles(years=years).values()]
+    inputs += [_contentHash(path, state) for path in artifact["files"]]
+    for dependency in artifact["dependsOn"]:
+        inputs += [_contentHash(path, state) for path in _artifactOutputs(dependency)]
+
+    return hashlib.sha1("\n".join(inputs).encode()).hexdigest()
+
+
+# Orders the artifacts so that every artifact comes after the artifacts it depends on
+def _artifactOrder(targets):
+    order = []
+
+    def visit(name, path):
+        if name in path:
+            raise ValueError(f"Artifacts depend on each other in a cycle: {' -> '.join(path + [name])}")
+        if name in order:
+            return
+        for dependency in ARTIFACTS[name]["dependsOn"]:
+            visit(dependency, path + [name])
+        order.append(name)
+
+    for name in targets:
+        visit(name, [])
+    return order
+
+
+# Rebuilds the artifacts that are stale, along with any artifacts they depend on that are stale. An
+# artifact is stale when one of its outputs is missing or was changed since it was built, or when its
+# function, arguments, inputs or the outputs of the artifacts it depends on have changed
+def buildArtifacts(targets=None, force=False):
+    """
+    Builds the stale artifacts and returns the names of the artifacts that were rebuilt
+    @ params
+    targets - Optional - An artifact name or list of artifact names. Defaults to every artifact in ARTIFACTS
+    force   - Optional - Rebuild the artifacts even if they are up to date
+    """
+    if targets is None:
+        targets = list(ARTIFACTS)
+    elif not isinstance(targets, list):
+        targets = [targets]
+
+    state = {"files": {}, "artifacts": {}}
+    if os.path.exists(_artifactStatePath()):
+        with open(_artifactStatePath()) as f:
+            state = json.load(f)
+
+    rebuilt = []
+    for name in _artifactOrder(targets):
+        artifact = ARTIFACTS[name]
+        key = _artifactKey(name, state)
+        built = state["artifacts"].get(name)
+
+        upToDate = (not force and built is not None and built["key"] == key and
+                    all(os.path.exists(path) and _contentHash(path, state) == built["outputs"].get(path)
+                        for path in _artifactOutputs(name)))
+        if upToDate:
+            continue
+
+        ARTIFACT_BUILDERS[artifact["function"]](*artifact["args"])
+        state["artifacts"][name] = {"key": key,
+                                    "outputs": {path: _contentHash(path, state) for path in _artifactOutputs(name)}}
+        rebuilt.append(name)
+
+        # Record progress after every artifact, so an interrupted build does not redo finished work
+        os.makedirs(config.CACHE_FOLDER, exist_ok=True)
+        with open(_artifactStatePath(), "w") as f:
+            json.dump(state, f, indent=2)
+
+    return rebuilt
@@ -0,0 +1,182 @@
+# Benchmarks of the pipeline on synthetic Scorecard-shaped data
+
+import os
+import json
+import datetime
+import time
+import platform
+import tempfile
+import shutil
+import tracemalloc
+import pandas as pd
+import numpy as np
+
+from . import config
+from .config import states
+from .cache import cacheCollegeScorecardDatasets
+from .panel import _dataDictionaryTypes, IDENTIFIERS, scorecardPanel, readCollegeScorecardDatasets
+from .store import _columnStoreFolder, _aggregateCubeFolder, buildAggregateCube
+from .analysis import transformAttrsToStateLevel, generateNullCountTables, countInstOverTime
+
+
+# Writes synthetic yearly College Scorecard datasets with the column layout of the data dictionary, so the
+# pipeline can be measured without the real data. Numeric attributes are random values of the dictionary's
+# type, with a share of them missing or "PrivacySuppressed", and a few institutions are placed in territories
+def generateSyntheticScorecard(folder, rows=2000, years=range(1996, 2014), columns=None, nullRate=0.2,
+                               suppressedRate=0.05, seed=0):
+    """
+    Generates one CSV per year named like the real datasets, e.g. MERGED1996_97_PP.csv
+    @ params
+    folder         - Required - Folder the datasets are written to
+    rows           - Optional - Number of institutions in each year
+    years          - Optional - Years to generate datasets for
+    columns        - Optional - Attributes to include. Defaults to every attribute in the data dictionary
+    nullRate       - Optional - Share of numeric values that are missing
+    suppressedRate - Optional - Share of numeric values that are "PrivacySuppressed"
+    seed           - Optional - Seed for the random number generator
+    """
+    rng = np.random.default_rng(seed)
+    types = _dataDictionaryTypes()
+    columns = list(types) if columns is None else list(dict.fromkeys(IDENTIFIERS + columns))
+
+    os.makedirs(folder, exist_ok=True)
+    for year in years:
+        data = {}
+        for col in columns:
+            if col in ["UNITID", "OPEID", "opeid6"]:
+                data[col] = np.arange(100000, 100000 + rows)
+            elif col == "INSTNM":
+                data[col] = [f"Institution {i}" for i in range(rows)]
+            elif col == "STABBR":
+                data[col] = rng.choice(states + ["PR", "GU", "VI"], rows)
+            elif types.get(col) == "string":
+                data[col] = rng.choice(["A", "B", "C"], rows)
+            else:
+                values = rng.integers(0, 50000, rows) if types.get(col) == "integer" else rng.random(rows).round(4)
+                values = values.astype(object)
+                draw = rng.random(rows)
+                values[draw < nullRate] = None
+                values[(draw >= nullRate) & (draw < nullRate + suppressedRate)] = "PrivacySuppressed"
+                data[col] = values
+
+        frame = pd.DataFrame(data, columns=columns)
+        frame.to_csv(os.path.join(folder, f"MERGED{year}_{str(year + 1)[2:]}_PP.csv"), index=False)
+
+
+# Times a stage of the benchmark and records its peak memory allocation. Tracing allocations slows pandas
+# down severalfold, so the stage is run twice: once timed without tracing, and once traced for the peak.
+# reset is called before each run to put back the state the stage starts from
+def _benchmarkStage(results, name, reset, func, *args, **kwargs):
+    reset()
+    start = time.perf_counter()
+    func(*args, **kwargs)
+    seconds = time.perf_counter() - start
+
+    reset()
+    tracemalloc.start()
+    try:
+        func(*args, **kwargs)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    results[name] = {"seconds": seconds, "peakBytes": peak}
+
+
+# Measures each stage of the pipeline on synthetic Scorecard-shaped data: reading the raw CSVs, building the
+# Parquet cache, reading from the cache and from memory, aggregating to state level, counting nulls and
+# counting institutions, the last three both without and with the aggregate cube built. The datasets, cache
+# and spreadsheets are written to a temporary folder, and the results can be saved as JSON to compare against
+# later runs with compareBenchmarks
+def benchmarkPipeline(output=None, rows=2000, years=range(1996, 2014), columns=None, nullRate=0.2,
+                      suppressedRate=0.05, seed=0):
+    """
+    Returns the time and peak memory of every stage of the pipeline
+    @ params
+    output - Optional - Path of a JSON file the results are written to
+    The remaining parameters are passed to generateSyntheticScorecard
+    """
+    attrs = ["TUITIONFEE_IN", "TUITIONFEE_OUT", "UGDS_WHITE", "UGDS_BLACK", "UGDS_HISP", "UGDS_ASIAN", "CDR3",
+             "C150_4_WHITE", "C150_4_BLACK", "C150_4_HISP", "C150_4_ASIAN", "C150_4_NHPI", "C150_4_NRA",
+             "C150_4_UNKN", "PBI"]
+    if columns is not None:
+        columns = list(dict.fromkeys(attrs + columns))
+
+    saved = config.SCORECARD_FOLDER, config.CACHE_FOLDER, os.getcwd()
+    stages = {}
+    with tempfile.TemporaryDirectory() as work:
+        try:
+            # The pipeline writes its datasets relative to the working directory
+            config.SCORECARD_FOLDER = os.path.join(work, "datasets")
+            config.CACHE_FOLDER = os.path.join(work, "Cache")
+            os.makedirs(os.path.join(work, "Visualization Datasets"))
+            os.chdir(work)
+
+            generateSyntheticScorecard(config.SCORECARD_FOLDER, rows, years, columns, nullRate, suppressedRate, seed)
+            year = max(years)
+
+            # Starts a stage from the Parquet cache, without the column store and aggregate cube, so it pays
+            # for whatever reads and aggregation it needs
+            def coldStart():
+                scorecardPanel.clear()
+                for folder in [_columnStoreFolder(), _aggregateCubeFolder()]:
+                    shutil.rmtree(folder, ignore_errors=True)
+
+            # Starts a stage with every attribute it reads already in the aggregate cube, so that it only pays
+            # for querying the cube. Year-restricted queries only use the cube when it holds their attributes
+            def warmStart():
+                buildAggregateCube(attrs)
+                scorecardPanel.clear()
+
+            _benchmarkStage(stages, "read csv", scorecardPanel.clear, readCollegeScorecardDatasets, attrs,
+                            useCache=False)
+            _benchmarkStage(stages, "ingest cache", lambda: None, cacheCollegeScorecardDatasets, force=True)
+            _benchmarkStage(stages, "read cache", scorecardPanel.clear, readCollegeScorecardDatasets, attrs)
+            _benchmarkStage(stages, "read memory", lambda: None, readCollegeScorecardDatasets, attrs)
+
+            # Each stage of the pipeline is measured from a cold start, and once more with the cube holding
+            # every attribute it reads
+            for name, func, args in [("transformAttrsToStateLevel", transformAttrsToStateLevel,
+                                      [attrs, "", year, False]),
+                                     ("generateNullCountTables", generateNullCountTables, []),
+                                     ("countInstOverTime", countInstOverTime, [])]:
+                _benchmarkStage(stages, name, coldStart, func, *args)
+                _benchmarkStage(stages, f"{name} (warm cube)", warmStart, func, *args)
+        finally:
+            config.SCORECARD_FOLDER, config.CACHE_FOLDER, cwd = saved
+            os.chdir(cwd)
+            scorecardPanel.clear()
+
+    results = {
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "config": {"rows": rows, "years": list(years), "columns": len(columns) if columns else "all",
+                   "nullRate": nullRate, "suppressedRate": suppressedRate, "seed": seed},
+        "stages": stages,
+    }
+    if output is not None:
+        with open(output, "w") as f:
+            json.dump(results, f, indent=2)
+    return results
+
+
+# Compares two benchmark results saved by benchmarkPipeline, and returns the stages whose time or peak
+# memory grew by more than the given tolerance relative to the baseline
+def compareBenchmarks(baseline, current, tolerance=0.1):
+    """
+    Returns a dataframe with the baseline and current values of every stage, flagging regressions
+    @ params
+    baseline  - Required - Path of the baseline JSON results
+    current   - Required - Path of the JSON results to check
+    tolerance - Optional - Relative increase allowed before a stage counts as a regression
+    """
+    with open(baseline) as f:
+        before = pd.DataFrame(json.load(f)["stages"]).T
+    with open(current) as f:
+        after = pd.DataFrame(json.load(f)["stages"]).T
+
+    comparison = before.join(after, lsuffix=" baseline", rsuffix=" current", how="outer")
+    for metric in ["seconds", "peakBytes"]:
+        comparison[f"{metric} change"] = comparison[f"{metric} current"] / comparison[f"{metric} baseline"] - 1
+    comparison["Regression"] = (comparison[["seconds change", "peakBytes change"]] > tolerance).any(axis=1)
+    return comparison
@@ -0,0 +1,280 @@
+# Caching of parsed source files as Parquet, with the file locks, atomic writes and worker pools the caches
+# are built with
+
+import os
+import re
+import json
+import hashlib
+import time
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+import numpy as np
+
+from . import config
+from .config import _sharedSettings, _applySettings
+
+
+# Finds the yearly College Scorecard datasets in a folder. The year of each dataset is parsed from its
+# filename (MERGED1996_97_PP.csv holds the data collected in 1996), so the mapping does not depend on the
+# order in which the filesystem lists the files
+def scorecardFiles(folder=None, years=None):
+    """
+    Returns a dictionary mapping each year to the path of its dataset, sorted by year
+    @ params
+    folder - Optional - Folder containing the datasets. Defaults to SCORECARD_FOLDER
+    years  - Optional - A year or list of years to restrict the result to
+    """
+    folder = folder or config.SCORECARD_FOLDER
+
+    files = {}
+    for file in os.listdir(folder):
+        match = re.match(r"MERGED(\d{4})_\d{2}", file)
+        if match:
+            files[int(match.group(1))] = os.path.join(folder, file)
+
+    if years is not None:
+        if not isinstance(years, list):
+            years = [years]
+        missing = [year for year in years if year not in files]
+        if missing:
+            raise ValueError(f"No College Scorecard dataset found for {missing} in {folder}")
+        files = {year: files[year] for year in years}
+
+    return dict(sorted(files.items()))
+
+
+# Records the size and modification time of a file, used to check whether a cached copy is stale
+def _fileSignature(path):
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime": stat.st_mtime}
+
+
+# Computes the SHA-1 hash of a file's contents, reading it in blocks so large datasets are not held in memory
+def _fileHash(path, blockSize=1 << 20):
+    sha = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(blockSize), b""):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+# Determines whether the cache entry recorded for a source file still matches the file on disk. Size and
+# modification time are checked first, and the contents are only hashed when those have changed
+def _cacheEntryIsFresh(entry, path):
+    if entry is None or not os.path.exists(entry["cache"]):
+        return False
+
+    signature = _fileSignature(path)
+    if signature["size"] != entry["size"]:
+        return False
+    if signature["mtime"] == entry["mtime"]:
+        return True
+
+    # The file was touched, but its contents may not have changed
+    if _fileHash(path) != entry["sha1"]:
+        return False
+    entry["mtime"] = signature["mtime"]
+    return True
+
+
+# Writes a file under a temporary name and moves it into place once it is complete, so other processes never
+# see a partly written file, and processes that have the previous file open or memory-mapped keep reading it
+def _writeAtomically(path, write):
+    temporary = f"{path}.{os.getpid()}.tmp"
+    write(temporary)
+    os.replace(temporary, path)
+
+
+# Writes a NumPy array to a .npy file, used with _writeAtomically. The file is opened directly, since np.save
+# would add a .npy extension to the temporary name
+def _writeArray(path, values):
+    with open(path, "wb") as f:
+        np.save(f, values)
+
+
+# Writes a JSON file, used with _writeAtomically
+def _writeJson(path, value):
+    with open(path, "w") as f:
+        json.dump(value, f, indent=2)
+
+
+# Holds an exclusive lock on a lock file while cached data shared between processes is built, so that worker
+# processes wait for each other instead of writing the same files at once. The operating system releases the
+# lock when its owner exits or dies, so a lock is never taken over while a long build is still running, and the
+# lock file itself is left in place
+@contextmanager
+def _fileLock(path, poll=0.05):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "a+b") as f:
+        if os.name == "nt":
+            import msvcrt
+
+            # The blocking lock of Windows gives up after ten seconds, so the non-blocking lock is polled instead
+            while True:
+                try:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+                    break
+                except OSError:
+                    time.sleep(poll)
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def _scorecardCacheFolder(cacheFolder=None):
+    return os.path.join(cacheFolder or config.CACHE_FOLDER, "scorecard")
+
+
+# Reads a cache manifest, which is empty until the first file has been cached
+def _readManifest(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+# Records new or changed manifest entries. The manifest is read again under a lock and only the given entries
+# are replaced, so processes caching different files at the same time keep each other's entries
+def _updateManifest(path, entries):
+    with _fileLock(path + ".lock"):
+        manifest = _readManifest(path)
+        manifest.update(entries)
+        _writeAtomically(path, lambda temporary: _writeJson(temporary, manifest))
+    return manifest
+
+
+# Determines whether each manifest entry of the given source files is still fresh. Entries that are not are
+# removed from the manifest, and entries of files that were touched without being changed are given the new
+# modification time, so their contents are hashed once here rather than on every later read
+def _checkManifest(manifest, keys, paths):
+    refreshed = {}
+    for key, path in zip(keys, paths):
+        entry = manifest.get(key)
+        mtime = None if entry is None else entry["mtime"]
+        if not _cacheEntryIsFresh(entry, path):
+            manifest.pop(key, None)
+        elif entry["mtime"] != mtime:
+            refreshed[key] = entry
+    return refreshed
+
+
+def _scorecardManifestPath(cacheFolder=None):
+    return os.path.join(_scorecardCacheFolder(cacheFolder), "manifest.json")
+
+
+# Reads the manifest describing which yearly Scorecard files have been cached
+def _readScorecardManifest(cacheFolder=None):
+    return _readManifest(_scorecardManifestPath(cacheFolder))
+
+
+# Reads the entries of the Scorecard manifest that are fresh for the given yearly datasets, saving the
+# modification times of files that were touched without being changed
+def _freshScorecardManifest(paths, cacheFolder=None):
+    manifest = _readScorecardManifest(cacheFolder)
+    paths = list(paths)
+    refreshed = _checkManifest(manifest, [os.path.basename(path) for path in paths], paths)
+    if refreshed:
+        _updateManifest(_scorecardManifestPath(cacheFolder), refreshed)
+    return manifest
+
+
+# Applies func to each set of arguments, either in this process or spread across a pool of worker
+# processes. Results are always returned in the order of the arguments
+def _mapParallel(func, *iterables, workers=None):
+    workers = workers or config.SCORECARD_WORKERS
+    if workers <= 1:
+        return list(map(func, *iterables))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_applySettings,
+                             initargs=(_sharedSettings(),)) as executor:
+        return list(executor.map(func, *iterables))
+
+
+# Converts a single yearly College Scorecard dataset into a Parquet file and returns its manifest entry
+def _cacheScorecardYear(path, year, root):
+    # Parse the whole dataset once. PrivacySuppressed values are stored as missing values
+    data = pd.read_csv(path, na_values=["PrivacySuppressed"], low_memory=False)
+
+    partition = os.path.join(root, f"Year={year}")
+    os.makedirs(partition, exist_ok=True)
+    cachePath = os.path.join(partition, "data.parquet")
+    _writeAtomically(cachePath, lambda temporary: data.to_parquet(temporary, index=False))
+
+    entry = _fileSignature(path)
+    entry["sha1"] = _fileHash(path)
+    entry["year"] = year
+    entry["cache"] = cachePath
+    return entry
+
+
+# Converts every yearly College Scorecard dataset into a Parquet file partitioned by year. Files whose
+# cached copy is still fresh are skipped, so this only needs to be rerun when the source data changes
+def cacheCollegeScorecardDatasets(folder=None, cacheFolder=None, force=False, workers=None, years=None):
+    root = _scorecardCacheFolder(cacheFolder)
+    os.makedirs(root, exist_ok=True)
+
+    manifest = _readScorecardManifest(cacheFolder)
+    paths = scorecardFiles(folder, years)
+    files = [os.path.basename(path) for path in paths.values()]
+    if force:
+        manifest, refreshed = {}, {}
+    else:
+        refreshed = _checkManifest(manifest, files, paths.values())
+
+    # Find the yearly datasets whose cached copy is missing or stale
+    stale = [(file, path, year) for file, (year, path) in zip(files, paths.items()) if file not in manifest]
+
+    # Convert the stale datasets, possibly in parallel
+    entries = _mapParallel(_cacheScorecardYear, [path for _, path, _ in stale], [year for _, _, year in stale],
+                        [root] * len(stale), workers=workers)
+    refreshed.update((file, entry) for (file, _, _), entry in zip(stale, entries))
+
+    if not refreshed:
+        return _readScorecardManifest(cacheFolder)
+    return _updateManifest(_scorecardManifestPath(cacheFolder), refreshed)
+
+
+# Parses a source file with parse, caching the parsed dataframe as Parquet under the named cache folder.
+# The cached copy is used for as long as the source file is unchanged. variant distinguishes different
+# ways of parsing the same file, such as different sheets
+def _readCached(path, parse, cacheName, useCache=True, cacheFolder=None, variant=None):
+    if not useCache:
+        return parse(path)
+
+    root = os.path.join(cacheFolder or config.CACHE_FOLDER, cacheName)
+    manifestPath = os.path.join(root, "manifest.json")
+    manifest = _readManifest(manifestPath)
+
+    key = os.path.normpath(path)
+    cacheFile = "{}.parquet"
+    if variant is not None:
+        key += "|" + variant
+        cacheFile = "{}-" + hashlib.sha1(variant.encode()).hexdigest()[:12] + ".parquet"
+
+    refreshed = _checkManifest(manifest, [key], [path])
+    if refreshed:
+        _updateManifest(manifestPath, refreshed)
+    if key in manifest:
+        return pd.read_parquet(manifest[key]["cache"])
+
+    data = parse(path)
+
+    os.makedirs(root, exist_ok=True)
+    entry = _fileSignature(path)
+    entry["sha1"] = _fileHash(path)
+    entry["cache"] = os.path.join(root, cacheFile.format(entry["sha1"]))
+    _writeAtomically(entry["cache"], lambda temporary: data.to_parquet(temporary))
+    _updateManifest(manifestPath, {key: entry})
+
+    return data
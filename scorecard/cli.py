@@ -0,0 +1,95 @@
+# Command line interface of the pipeline
+
+import argparse
+
+from . import config
+from .panel import readCollegeScorecardDatasets
+from .aggregate import aggregateByState, streamAggregateByState
+from .datasets import OUTPUT_WRITERS, writeDataset
+from .analysis import profileNulls, generateNullCountTables, countInstOverTime
+from .plots import DEFAULT_FIGURES, renderFigures
+from .artifacts import ARTIFACTS, buildArtifacts
+
+
+# Command line entry point that runs a single named job, so that scheduled jobs do not need to import the
+# module themselves, and is run by "Data Exploration.py" or python -m scorecard. Only the libraries a job uses
+# are imported: the aggregation, null profile and count jobs never load the plotting or geo libraries. For
+# example
+#   python "Data Exploration.py" aggregate TUITIONFEE_IN TUITIONFEE_OUT --name "tuition by state" --years 2013
+#   python "Data Exploration.py" render "default rate by state 2013" --format svg
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="Data Exploration.py",
+                                     description="Runs a job of the College Scorecard pipeline")
+    parser.add_argument("--scorecard-folder", help="Folder containing the yearly College Scorecard datasets")
+    parser.add_argument("--workers", type=int, help="Number of processes used to read the yearly datasets")
+    parser.add_argument("--output-format", choices=list(OUTPUT_WRITERS), help="Format datasets are written in")
+    parser.add_argument("--no-cache", action="store_true", help="Read the raw CSVs instead of the Parquet cache")
+    jobs = parser.add_subparsers(dest="job", required=True)
+
+    aggregate = jobs.add_parser("aggregate", help="Aggregate attributes by state and write them as a dataset")
+    aggregate.add_argument("attrs", nargs="+")
+    aggregate.add_argument("--name", required=True, help="Name of the dataset written")
+    aggregate.add_argument("--stats", nargs="+", default=["mean"])
+    aggregate.add_argument("--years", nargs="+", type=int)
+    aggregate.add_argument("--states", nargs="+")
+    aggregate.add_argument("--by-year", action="store_true", help="Aggregate each year separately")
+    aggregate.add_argument("--stream", action="store_true", help="Stream the datasets in chunks to bound memory")
+
+    nullProfile = jobs.add_parser("null-profile", help="Profile the null values of attributes by state and year. "
+                                                       "Without attributes, generates the null count tables")
+    nullProfile.add_argument("attrs", nargs="*")
+    nullProfile.add_argument("--name", help="Name of the dataset written")
+    nullProfile.add_argument("--years", nargs="+", type=int)
+
+    jobs.add_parser("count", help="Count the institutions in every state and year")
+
+    render = jobs.add_parser("render", help="Render figures to files without displaying them")
+    render.add_argument("figures", nargs="*", help="Names of the figures to render. Defaults to every figure")
+    render.add_argument("--folder", default="Figures")
+    render.add_argument("--format", nargs="+", default=["png"], dest="formats")
+
+    build = jobs.add_parser("build", help="Rebuild the derived datasets and figures that are out of date")
+    build.add_argument("artifacts", nargs="*", help="Names of the artifacts to build. Defaults to every artifact")
+    build.add_argument("--force", action="store_true")
+
+    args = parser.parse_args(argv)
+    if args.scorecard_folder:
+        config.SCORECARD_FOLDER = args.scorecard_folder
+    if args.workers:
+        config.SCORECARD_WORKERS = args.workers
+    if args.output_format:
+        config.OUTPUT_FORMAT = args.output_format
+    useCache = not args.no_cache
+    # Figures and artifacts are built from the Parquet cache, which they bring up to date themselves
+    if args.no_cache and args.job in ["render", "build"]:
+        parser.error(f"--no-cache is not supported by the {args.job} job")
+
+    if args.job == "aggregate":
+        if args.stream:
+            result = streamAggregateByState(args.attrs, args.stats, byYear=args.by_year, useCache=useCache,
+                                            years=args.years, stateCodes=args.states)
+        else:
+            data = readCollegeScorecardDatasets(args.attrs, useCache=useCache, years=args.years,
+                                                stateCodes=args.states)
+            result = aggregateByState(data, args.attrs, args.stats, byYear=args.by_year)
+        writeDataset(args.name, result)
+    elif args.job == "null-profile":
+        if args.attrs:
+            profileNulls(args.attrs, years=args.years, name=args.name or "Null Profile", useCache=useCache)
+        else:
+            generateNullCountTables(useCache)
+    elif args.job == "count":
+        countInstOverTime(useCache)
+    elif args.job == "render":
+        specs = [spec for spec in DEFAULT_FIGURES if not args.figures or set(args.figures) & set(spec["names"])]
+        if not specs:
+            parser.error(f"No figures named {', '.join(args.figures)}")
+        for path in renderFigures(specs, args.folder, args.formats):
+            print(path)
+    elif args.job == "build":
+        unknown = [name for name in args.artifacts if name not in ARTIFACTS]
+        if unknown:
+            parser.error(f"No artifacts named {', '.join(unknown)}")
+        for name in buildArtifacts(args.artifacts or None, force=args.force):
+            print(name)
+    return 0
@@ -0,0 +1,49 @@
+# Settings of the College Scorecard pipeline. The other modules read them from this module whenever they are
+# used, so they are changed here at run time, e.g. scorecard.config.SCORECARD_FOLDER = "datasets"
+
+import os
+
+states = ['AK', 'AL', 'AR', 'AZ', 'CA', 'CO', 'CT', 'DC', 'DE', 'FL', 'GA',
+          'HI', 'IA', 'ID', 'IL', 'IN', 'KS', 'KY', 'LA', 'MA', 'MD', 'ME',
+          'MI', 'MN', 'MO', 'MS', 'MT', 'NC', 'ND', 'NE', 'NH', 'NJ', 'NM',
+          'NV', 'NY', 'OH', 'OK', 'OR', 'PA', 'RI', 'SC', 'SD', 'TN', 'TX',
+          'UT', 'VA', 'VT', 'WA', 'WI', 'WV', 'WY']
+
+# Filepath that points to College Scorecard data from 1996 to 2013. Can be overridden with the
+# SCORECARD_FOLDER environment variable
+SCORECARD_FOLDER = os.environ.get(
+    "SCORECARD_FOLDER", r"D:\0_Work\Python Projects\DS105-Data-Storage\College Scorecard Datasets\datasets")
+# Folder where parsed datasets are cached in a columnar (Parquet) format
+CACHE_FOLDER = "Cache"
+# Number of processes used to read the yearly datasets. 1 reads them one after another
+SCORECARD_WORKERS = 1
+# Folder containing the FRED series downloaded as .xls files
+FRED_FOLDER = "FRED Data"
+# TIGER shapefile with the boundaries of every state, and the tolerance (in degrees) its polygons are
+# simplified to before they are drawn on a map
+STATE_SHAPEFILE = os.path.join("tl_2017_us_state", "tl_2017_us_state.shp")
+GEOMETRY_TOLERANCE = 0.01
+# Data dictionary describing the type of every College Scorecard attribute. It is part of the repository, so
+# it is found relative to the repository rather than to the working directory
+DATA_DICTIONARY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Kaggle Datasets",
+                               "CollegeScorecardDataDictionary-09-12-2015.csv")
+
+# Folder the derived datasets are written to, and the format they are written in. Parquet, Feather and CSV
+# write one file per sheet and are much faster than Excel, which is kept as an optional export. The format
+# can be overridden with the OUTPUT_FORMAT environment variable
+OUTPUT_FOLDER = "Visualization Datasets"
+OUTPUT_FORMAT = os.environ.get("OUTPUT_FORMAT", "parquet")
+
+# Settings that may be changed at run time, by the command line or by assigning to this module. Worker
+# processes started with spawn import this module afresh, so the settings are passed to them explicitly
+SHARED_SETTINGS = ["SCORECARD_FOLDER", "CACHE_FOLDER", "SCORECARD_WORKERS", "FRED_FOLDER", "STATE_SHAPEFILE",
+                   "DATA_DICTIONARY", "OUTPUT_FOLDER", "OUTPUT_FORMAT"]
+
+
+def _sharedSettings():
+    return {name: globals()[name] for name in SHARED_SETTINGS}
+
+
+# Initializes a worker process with the settings of the process that started it
+def _applySettings(settings):
+    globals().update(settings)
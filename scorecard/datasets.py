@@ -0,0 +1,110 @@
+# Reading and writing of the derived datasets in the Visualization Datasets folder
+
+import os
+import re
+import pandas as pd
+
+from . import config
+from .instrumentation import stage
+
+
+# Writes every sheet of a workbook in one go
+def _writeExcel(path, sheets):
+    with pd.ExcelWriter(path) as xlw:
+        for sheet, frame in sheets.items():
+            frame.to_excel(xlw, sheet_name=sheet, index=False)
+
+
+# The output formats, with the extension of their files, how a dict of sheets is written and how a sheet
+# is read back. Columnar formats hold a single sheet per file, so they are given a one sheet dict
+OUTPUT_WRITERS = {
+    "parquet": (".parquet", lambda path, sheets: next(iter(sheets.values())).to_parquet(path, index=False),
+                lambda path, sheet: pd.read_parquet(path)),
+    "feather": (".feather", lambda path, sheets: next(iter(sheets.values())).to_feather(path),
+                lambda path, sheet: pd.read_feather(path)),
+    "csv": (".csv", lambda path, sheets: next(iter(sheets.values())).to_csv(path, index=False),
+            lambda path, sheet: pd.read_csv(path)),
+    "excel": (".xlsx", _writeExcel, lambda path, sheet: pd.read_excel(path, sheet_name=sheet)),
+}
+
+
+# Returns the path a sheet of a dataset is stored at. Excel stores every sheet in one workbook, while the
+# other formats store the first sheet ("main" or "Sheet1") as the dataset itself and every other sheet in
+# a file of its own
+def datasetPath(name, sheet=None, format=None, folder=None):
+    format = format or config.OUTPUT_FORMAT
+    extension = OUTPUT_WRITERS[format][0]
+    if format != "excel" and sheet not in (None, "main", "Sheet1"):
+        name = f"{name} - {sheet}"
+    return os.path.join(folder or config.OUTPUT_FOLDER, name + extension)
+
+
+# Writes a derived dataset and returns the paths of the files written. Column labels are stored as strings,
+# as the columnar formats require, and a named index is stored as a column
+def writeDataset(name, sheets, format=None, folder=None):
+    """
+    Writes one or more sheets of a dataset in a single pass
+    @ params
+    name   - Required - Name of the dataset, e.g. "instiution count data"
+    sheets - Required - A dataframe, or a dict of sheet names to dataframes. A single dataframe is saved as
+                        the "main" sheet
+    format - Optional - "parquet", "feather", "csv" or "excel". Defaults to OUTPUT_FORMAT
+    folder - Optional - Folder the dataset is written to. Defaults to OUTPUT_FOLDER
+    """
+    format = format or config.OUTPUT_FORMAT
+    if isinstance(sheets, pd.DataFrame):
+        sheets = {"main": sheets}
+
+    prepared = {}
+    for sheet, frame in sheets.items():
+        if any(frame.index.names):
+            frame = frame.reset_index()
+        else:
+            frame = frame.reset_index(drop=True)
+        frame.columns = [str(column) for column in frame.columns]
+        prepared[sheet] = frame
+
+    os.makedirs(folder or config.OUTPUT_FOLDER, exist_ok=True)
+    write = OUTPUT_WRITERS[format][1]
+    if format == "excel":
+        groups = {datasetPath(name, format=format, folder=folder): prepared}
+    else:
+        groups = {datasetPath(name, sheet, format, folder): {sheet: frame} for sheet, frame in prepared.items()}
+
+    with stage("persist", file=name, format=format, rows=sum(len(frame) for frame in prepared.values())):
+        for path, group in groups.items():
+            write(path, group)
+    return list(groups)
+
+
+# Reads a sheet of a derived dataset written by writeDataset, falling back to an Excel workbook of the same
+# name when there is no file in the configured format. The dataset can also be given as the path of an
+# existing file, whose format is taken from its extension. Column labels that are years are turned back
+# into integers, as they are when read from Excel
+def readDataset(name, sheet="main", format=None, folder=None):
+    """
+    Returns a sheet of a dataset as a dataframe
+    @ params
+    name   - Required - Name of the dataset, or path of a dataset file
+    sheet  - Optional - The sheet to read. Defaults to "main"
+    format - Optional - "parquet", "feather", "csv" or "excel". Defaults to OUTPUT_FORMAT
+    folder - Optional - Folder the dataset is read from. Defaults to OUTPUT_FOLDER
+    """
+    extensions = {extension: key for key, (extension, _, _) in OUTPUT_WRITERS.items()}
+    extension = os.path.splitext(name)[1].lower()
+    if extension in extensions and os.path.exists(name):
+        format, path = extensions[extension], name
+    else:
+        format = format or config.OUTPUT_FORMAT
+        path = datasetPath(name, sheet, format, folder)
+        # Datasets checked into the repository were written as Excel workbooks before the other formats
+        # existed, so they are read from there until they are regenerated
+        if not os.path.exists(path) and os.path.exists(datasetPath(name, sheet, "excel", folder)):
+            format, path = "excel", datasetPath(name, sheet, "excel", folder)
+
+    with stage("read", file=path, bytesRead=os.path.getsize(path)):
+        data = OUTPUT_WRITERS[format][2](path, sheet)
+    data.columns = [int(column) if isinstance(column, str) and re.fullmatch(r"\d{4}", column) else column
+                    for column in data.columns]
+    # Older spreadsheets in the repository store the states as an unnamed index column
+    return data.rename(columns={"Unnamed: 0": "State"})
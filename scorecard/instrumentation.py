@@ -0,0 +1,108 @@
+# Instrumentation of the stages of the pipeline: wall time, rows, bytes read and peak memory
+
+import sys
+import json
+import time
+import logging
+from contextlib import contextmanager
+import pandas as pd
+from functools import wraps
+
+
+try:
+    import resource
+except ImportError:
+    # The resource module is not available on Windows, where peak RSS is not recorded
+    resource = None
+
+
+# Receives a record for every instrumented stage of the pipeline. None disables instrumentation
+instrumentationSink = None
+
+
+# Sink that writes each stage record to a logger
+class LogSink:
+    def __init__(self, logger=None, level=logging.INFO):
+        self.logger = logger or logging.getLogger("scorecard")
+        self.level = level
+
+    def __call__(self, record):
+        self.logger.log(self.level, "%s: %.3fs, %s rows, %s bytes read, process peak RSS %s (raised by %s)",
+                        record["stage"], record["seconds"], record["rows"], record["bytesRead"],
+                        record["processPeakRSS"], record["peakRSSIncrease"])
+
+
+# Sink that appends each stage record to a JSON lines file
+class JsonLinesSink:
+    def __init__(self, path):
+        self.path = path
+
+    def __call__(self, record):
+        with open(self.path, "a") as f:
+            f.write(json.dumps(record, default=str) + "\n")
+
+
+# Sink that keeps the stage records in memory
+class MemorySink:
+    def __init__(self):
+        self.records = []
+
+    def __call__(self, record):
+        self.records.append(record)
+
+    def frame(self):
+        return pd.DataFrame(self.records)
+
+
+# Turns instrumentation on by sending stage records to sink, or off when sink is None. Worker processes
+# started by the pool inherit the sink, so an in-memory sink only collects the stages run in this process
+def setInstrumentationSink(sink):
+    global instrumentationSink
+    instrumentationSink = sink
+
+
+# Returns the peak resident set size this process has reached since it started, in bytes, or None where it
+# cannot be measured
+def _peakRSS():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux reports kilobytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+# Records the wall time of the code run inside the with block, along with any details about it, such as the
+# rows processed or bytes read, that the block adds to the yielded record. The operating system only reports
+# the peak RSS of the whole process so far, so the record holds that peak once the block is done
+# (processPeakRSS) and how far the block raised it (peakRSSIncrease). The increase is zero for a block that
+# stays below an earlier peak, even if it allocates a lot. Does nothing when instrumentation is turned off
+@contextmanager
+def stage(name, **details):
+    record = {"stage": name, "rows": None, "bytesRead": None, **details}
+    if instrumentationSink is None:
+        yield record
+        return
+
+    start, startPeak = time.perf_counter(), _peakRSS()
+    try:
+        yield record
+    finally:
+        record["seconds"] = time.perf_counter() - start
+        record["processPeakRSS"] = _peakRSS()
+        record["peakRSSIncrease"] = None if startPeak is None else record["processPeakRSS"] - startPeak
+        instrumentationSink(record)
+
+
+# Decorator that records every call of a function as a stage. Dataframes returned by the function are
+# counted as the rows it processed
+def instrumented(name):
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name, function=func.__name__) as record:
+                result = func(*args, **kwargs)
+                if isinstance(result, pd.DataFrame):
+                    record["rows"] = len(result)
+                return result
+        return wrapper
+    return decorator
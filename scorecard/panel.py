@@ -0,0 +1,416 @@
+# Typed reads of the yearly College Scorecard datasets, whole, in chunks, or indexed by institution
+
+import os
+import pandas as pd
+import numpy as np
+from pandas.api.types import union_categoricals
+from collections import OrderedDict
+from functools import lru_cache
+
+from . import config
+from . import instrumentation
+from .config import states
+from .instrumentation import stage
+from .cache import scorecardFiles, _fileSignature, _cacheEntryIsFresh, _freshScorecardManifest, _mapParallel
+
+
+# Reads the API data type of every attribute from the College Scorecard data dictionary at DATA_DICTIONARY.
+# Without it text columns such as INSTNM could not be told apart from numbers, so a missing dictionary is an
+# error
+def _dataDictionaryTypes():
+    return _readDataDictionary(config.DATA_DICTIONARY)
+
+
+# Reads a data dictionary once per path, so changing DATA_DICTIONARY reads the new dictionary
+@lru_cache(maxsize=None)
+def _readDataDictionary(path):
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"College Scorecard data dictionary not found at {path}. Set "
+                                "scorecard.config.DATA_DICTIONARY to the path of "
+                                "CollegeScorecardDataDictionary-09-12-2015.csv")
+    dictionary = pd.read_csv(path, usecols=["VARIABLE NAME", "API data type"]).dropna()
+    return dict(zip(dictionary["VARIABLE NAME"], dictionary["API data type"]))
+
+
+# Determines the in-memory type of each College Scorecard column from the data dictionary. State codes are
+# categorical over the 50 states and DC, so territories become missing values, institution names and other
+# text are categorical, rates and shares are 32-bit floats, and counts are nullable 32-bit integers.
+# Columns without a type in the dictionary are left out, and keep the type they are parsed as
+def scorecardDtypes(columns):
+    types = _dataDictionaryTypes()
+
+    dtypes = {}
+    for col in columns:
+        if col == "STABBR":
+            dtypes[col] = pd.CategoricalDtype(states)
+        elif col == "ZIP" or types.get(col) == "string":
+            # ZIP codes are listed as integers, but some include a "-XXXX" suffix
+            dtypes[col] = "category"
+        elif types.get(col) == "float":
+            dtypes[col] = "float32"
+        elif types.get(col) == "integer":
+            dtypes[col] = "Int32"
+    return dtypes
+
+
+# Converts a dataframe read from a yearly dataset to the types chosen by scorecardDtypes. Integer attributes
+# that turn out to hold fractional values are kept as 32-bit floats instead, and text in columns the
+# dictionary has no type for is stored as categorical
+def _applyScorecardDtypes(data):
+    dtypes = scorecardDtypes(list(data.columns))
+    for col in data.columns:
+        if col == "STABBR":
+            # Territories are masked out before the fixed categories are set, since values outside the
+            # categories of a categorical are not allowed
+            codes = data[col].astype("category")
+            data[col] = codes.where(codes.isin(states)).cat.set_categories(states)
+            continue
+        if col not in dtypes:
+            if not pd.api.types.is_numeric_dtype(data[col]):
+                data[col] = data[col].astype("category")
+            continue
+        try:
+            data[col] = data[col].astype(dtypes[col])
+        except (TypeError, ValueError):
+            data[col] = data[col].astype("float32")
+    return data
+
+
+# Types used when parsing a yearly CSV. Text is parsed as categorical, and state codes get their fixed
+# categories once _applyScorecardDtypes has masked out the territories. Numbers are parsed as 64-bit floats
+# so that "PrivacySuppressed" can be read as a missing value before being narrowed. Columns the dictionary
+# has no type for are left to the parser
+def _scorecardParseDtypes(columns):
+    return {col: ("category" if isinstance(dtype, pd.CategoricalDtype) or dtype == "category" else "float64")
+            for col, dtype in scorecardDtypes(columns).items()}
+
+
+# Stacks the yearly datasets into one dataframe. Categorical columns whose categories differ between years,
+# such as institution names, are combined with union_categoricals so they stay categorical
+def _stackYears(frames):
+    columns = list(frames[0].columns)
+    unions = {}
+    for col in columns:
+        dtypes = [frame[col].dtype for frame in frames]
+        if all(isinstance(dtype, pd.CategoricalDtype) for dtype in dtypes) and any(d != dtypes[0] for d in dtypes):
+            unions[col] = union_categoricals([frame[col] for frame in frames], ignore_order=True)
+
+    overall = pd.concat([frame.drop(columns=list(unions)) for frame in frames], ignore_index=True)
+    for col, values in unions.items():
+        overall[col] = values
+    return overall[columns]
+
+
+# Returns the number of bytes of a Parquet file that hold the given columns, which is what reading only those
+# columns fetches, from the sizes of their column chunks in the file metadata
+def _parquetColumnBytes(path, columns):
+    import pyarrow.parquet as pq
+
+    metadata = pq.ParquetFile(path).metadata
+    columns = set(columns)
+    return sum(metadata.row_group(group).column(i).total_compressed_size
+               for group in range(metadata.num_row_groups) for i in range(metadata.num_columns)
+               if metadata.row_group(group).column(i).path_in_schema in columns)
+
+
+# Reads the given columns of a single yearly College Scorecard dataset, using the Parquet cache when the
+# cached copy of the file is still fresh. A CSV is scanned in full whichever columns are kept, while only
+# the chunks of the requested columns are read from Parquet, so bytesRead is counted accordingly
+def _readScorecardYear(path, columns, entry=None):
+    with stage("read", file=os.path.basename(path)) as record:
+        if _cacheEntryIsFresh(entry, path):
+            record["source"] = entry["cache"]
+            data = pd.read_parquet(entry["cache"], columns=columns)
+            if instrumentation.instrumentationSink is not None:
+                record["bytesRead"] = _parquetColumnBytes(entry["cache"], columns)
+        else:
+            record["source"] = path
+            # "PrivacySuppressed" entries are treated as missing values
+            data = pd.read_csv(path, usecols=columns, dtype=_scorecardParseDtypes(columns),
+                               na_values=["PrivacySuppressed"])
+            record["bytesRead"] = os.path.getsize(path)
+        record["rows"] = len(data)
+        return _applyScorecardDtypes(data)
+
+
+# Columns included in every read of the College Scorecard datasets. UNITID identifies an institution across
+# years, while names are not unique and change over time
+IDENTIFIERS = ["UNITID", "OPEID", "STABBR", "INSTNM"]
+
+
+# Keeps the columns of the College Scorecard datasets that have already been read in memory, so that
+# repeated or overlapping requests for attributes only read the columns that are missing. Columns are
+# evicted in least recently used order once the cache grows beyond maxBytes
+class ScorecardPanel:
+    """
+    In-memory, memory-bounded cache of College Scorecard columns
+    @ params
+    maxBytes - Optional - Upper bound on the memory used by the cached columns
+    """
+
+    def __init__(self, maxBytes=2 * 1024 ** 3):
+        self.maxBytes = maxBytes
+        # Maps (file, size, modification time, column) to the column's values for that version of a yearly
+        # dataset, so that columns are read again once the file changes
+        self._columns = OrderedDict()
+        self._sizes = {}
+        self.nbytes = 0
+
+    def _store(self, key, values):
+        size = int(values.memory_usage(deep=True))
+        self._columns[key] = values
+        self._sizes[key] = size
+        self.nbytes += size
+
+    def _evict(self):
+        # Drop the least recently used columns until the cache fits within its memory bound
+        while self.nbytes > self.maxBytes and self._columns:
+            key, _ = self._columns.popitem(last=False)
+            self.nbytes -= self._sizes.pop(key)
+
+    # Drops the columns of earlier versions of a yearly dataset
+    def _dropStale(self, version):
+        for key in [key for key in self._columns if key[0] == version[0] and key[:3] != version]:
+            del self._columns[key]
+            self.nbytes -= self._sizes.pop(key)
+
+    def clear(self):
+        self._columns.clear()
+        self._sizes.clear()
+        self.nbytes = 0
+
+    def read(self, keyAttributes, useCache=True, workers=None, years=None, stateCodes=None):
+        """
+        Returns the College Scorecard data across all years for the attributes in keyAttributes
+        @ params
+        keyAttributes - Required - An attribute name or list of attribute names
+        useCache      - Optional - Whether yearly datasets may be read from the Parquet cache
+        workers       - Optional - Number of processes used to read the yearly datasets
+        years         - Optional - A year or list of years to read. Defaults to every year
+        stateCodes    - Optional - A state abbreviation or list of state abbreviations to keep. Defaults to
+                                   the 50 states and DC
+        """
+        if not isinstance(keyAttributes, list):
+            keyAttributes = [keyAttributes]
+
+        # Ensures the institution identifiers, state abbreviation and institution name are recorded in final
+        # result. A new list is built so the caller's list is left untouched
+        columns = list(dict.fromkeys(keyAttributes + IDENTIFIERS))
+
+        # Data from US territories is always excluded
+        include = _includedStates(stateCodes)
+
+        # Only the datasets of the requested years are touched. Those that have a fresh Parquet copy are read
+        # from the cache instead of the raw CSV
+        paths = scorecardFiles(years=years)
+        manifest = _freshScorecardManifest(paths.values()) if useCache else {}
+        years = list(paths.keys())
+        files = []
+        for path in paths.values():
+            signature = _fileSignature(path)
+            version = (path, signature["size"], signature["mtime"])
+            self._dropStale(version)
+            files.append((version, manifest.get(os.path.basename(path))))
+
+        # Only read the columns that are not already in memory, possibly reading several years in parallel
+        reads = []
+        for version, entry in files:
+            missing = [col for col in columns if version + (col,) not in self._columns]
+            if missing:
+                reads.append((version, missing, entry))
+        results = (_mapParallel(_readScorecardYear, [version[0] for version, _, _ in reads],
+                                [missing for _, missing, _ in reads], [entry for _, _, entry in reads],
+                                workers=workers) if reads else [])
+        for (version, missing, _), data in zip(reads, results):
+            for col in missing:
+                self._store(version + (col,), data[col])
+
+        frames = []
+        for (version, _), year in zip(files, years):
+            # Mark the requested columns as recently used and assemble the data for the year
+            for col in columns:
+                self._columns.move_to_end(version + (col,))
+            data = pd.DataFrame({col: self._columns[version + (col,)] for col in columns})
+            # Keep only the states of interest before the years are stacked
+            data = data[data["STABBR"].isin(include)]
+            data["Year"] = pd.Categorical([year] * len(data), categories=years, ordered=True)
+            frames.append(data)
+
+        self._evict()
+
+        # Stack the yearly datasets into one dataframe
+        overall = _stackYears(frames)
+
+        # return the final dataframe
+        return overall
+
+
+# Panel shared by all of the analysis functions in this session
+scorecardPanel = ScorecardPanel()
+
+
+# Determines which state abbreviations a read keeps. Territories are excluded even when they are requested
+def _includedStates(stateCodes=None):
+    if stateCodes is None:
+        return states
+    if not isinstance(stateCodes, list):
+        stateCodes = [stateCodes]
+    return [state for state in stateCodes if state in states]
+
+
+# Reads the College Scorecard datasets across all years for the attributes in keyAttributes. Columns that
+# have already been read during this session are served from memory. Only the datasets for the given years
+# are read, and only institutions in the given states are kept
+def readCollegeScorecardDatasets(keyAttributes, useCache=True, workers=None, years=None, stateCodes=None):
+    return scorecardPanel.read(keyAttributes, useCache, workers, years, stateCodes)
+
+
+# Number of rows read at a time when streaming a yearly dataset
+STREAM_CHUNKSIZE = 100000
+
+
+# Reads the given columns of a yearly College Scorecard dataset in chunks of chunksize rows
+def _streamScorecardYear(path, columns, chunksize, entry=None):
+    if _cacheEntryIsFresh(entry, path):
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(entry["cache"]).iter_batches(batch_size=chunksize, columns=columns):
+            yield _applyScorecardDtypes(batch.to_pandas())
+    else:
+        with pd.read_csv(path, usecols=columns, dtype=_scorecardParseDtypes(columns),
+                         na_values=["PrivacySuppressed"], chunksize=chunksize) as reader:
+            for chunk in reader:
+                yield _applyScorecardDtypes(chunk)
+
+
+# Streams the College Scorecard data across all years for the attributes in keyAttributes. Chunks are read
+# one at a time, filtered to the 50 states and DC, and yielded with the same columns as
+# readCollegeScorecardDatasets, so memory use is bounded by the chunk size rather than the panel size
+def streamCollegeScorecardDatasets(keyAttributes, chunksize=None, memoryLimit=None, useCache=True, years=None,
+                                   stateCodes=None):
+    """
+    Yields the College Scorecard data in chunks
+    @ params
+    keyAttributes - Required - An attribute name or list of attribute names
+    chunksize     - Optional - Number of rows read at a time
+    memoryLimit   - Optional - Approximate number of bytes a chunk may use. Overrides chunksize
+    useCache      - Optional - Whether yearly datasets may be read from the Parquet cache
+    years         - Optional - A year or list of years to read. Defaults to every year
+    stateCodes    - Optional - A state abbreviation or list of state abbreviations to keep
+    """
+    if not isinstance(keyAttributes, list):
+        keyAttributes = [keyAttributes]
+
+    columns = list(dict.fromkeys(keyAttributes + IDENTIFIERS))
+    include = _includedStates(stateCodes)
+
+    # Estimate the size of a row while it is parsed: 8 bytes per numeric value, and roughly 64 bytes per
+    # string value
+    if memoryLimit is not None:
+        rowBytes = 8 * (len(columns) - 2) + 64 * 2
+        chunksize = max(1, int(memoryLimit // rowBytes))
+    chunksize = chunksize or STREAM_CHUNKSIZE
+
+    paths = scorecardFiles(years=years)
+    manifest = _freshScorecardManifest(paths.values()) if useCache else {}
+    years = list(paths.keys())
+
+    for year, path in paths.items():
+        for chunk in _streamScorecardYear(path, columns, chunksize, manifest.get(os.path.basename(path))):
+            # Exclude all data from US territories and states that were not requested
+            chunk = chunk[chunk["STABBR"].isin(include)]
+            chunk["Year"] = pd.Categorical([year] * len(chunk), categories=years, ordered=True)
+            yield chunk[columns + ["Year"]]
+
+
+# Index of the rows of the College Scorecard panel by institution. Rows are ordered by UNITID and then by
+# year, so the history of an institution is one contiguous, year-ordered block that is found with a binary
+# search instead of a scan of the whole panel. Institutions can also be looked up by OPEID, and searched by
+# the start of any name they have had
+class InstitutionIndex:
+    """
+    Sorted index of the panel by institution
+    @ params
+    data - Required - A dataframe returned by readCollegeScorecardDatasets
+    """
+
+    def __init__(self, data):
+        data = data[data["UNITID"].notna()]
+        unitids = data["UNITID"].to_numpy(dtype="int64")
+        years = data["Year"].astype("int64").to_numpy()
+        order = np.lexsort((years, unitids))
+
+        self.data = data.iloc[order].reset_index(drop=True)
+        self._unitids = unitids[order]
+        self._years = years[order]
+
+        # Row positions ordered by OPEID. Missing OPEIDs are sorted last and never match
+        opeids = self.data["OPEID"].to_numpy(dtype="float64", na_value=np.nan)
+        self._opeidOrder = np.argsort(opeids, kind="stable")
+        self._opeids = opeids[self._opeidOrder]
+
+        # Every name an institution has had, lowercased and sorted for prefix searches
+        names = pd.DataFrame({"key": self.data["INSTNM"].astype("string").str.lower(),
+                              "UNITID": self._unitids, "INSTNM": self.data["INSTNM"].astype("string")})
+        names = names.dropna().drop_duplicates(["key", "UNITID"]).sort_values(["key", "UNITID"])
+        self._nameKeys = names["key"].to_numpy(dtype=object)
+        self._names = names[["UNITID", "INSTNM"]].reset_index(drop=True)
+
+    # Positions of the rows of the given institutions, in the order the institutions are given
+    def _positions(self, unitids, years=None):
+        unitids = np.asarray(unitids, dtype="int64")
+        lefts = np.searchsorted(self._unitids, unitids, side="left")
+        lengths = np.searchsorted(self._unitids, unitids, side="right") - lefts
+        starts = np.cumsum(lengths) - lengths
+        positions = np.repeat(lefts, lengths) + np.arange(lengths.sum()) - np.repeat(starts, lengths)
+        if years is not None:
+            positions = positions[np.isin(self._years[positions], years if isinstance(years, list) else [years])]
+        return positions
+
+    def history(self, unitid, years=None):
+        """
+        Returns the rows of one institution ordered by year
+        @ params
+        unitid - Required - UNITID of the institution
+        years  - Optional - A year or list of years to keep
+        """
+        return self.data.iloc[self._positions([unitid], years)]
+
+    def histories(self, unitids, years=None):
+        """
+        Returns the rows of several institutions, grouped by institution in the given order and by year
+        @ params
+        unitids - Required - A list of UNITIDs
+        years   - Optional - A year or list of years to keep
+        """
+        return self.data.iloc[self._positions(unitids, years)]
+
+    def byOPEID(self, opeids, years=None):
+        """
+        Returns the rows of the institutions with the given OPEIDs, grouped by institution and ordered by year
+        @ params
+        opeids - Required - An OPEID or list of OPEIDs
+        years  - Optional - A year or list of years to keep
+        """
+        opeids = np.asarray(opeids if isinstance(opeids, list) else [opeids], dtype="float64")
+        lefts = np.searchsorted(self._opeids, opeids, side="left")
+        rights = np.searchsorted(self._opeids, opeids, side="right")
+        matches = np.concatenate([self._opeidOrder[left:right] for left, right in zip(lefts, rights)] + [[]])
+        unitids = pd.unique(self._unitids[matches.astype("int64")])
+        return self.histories(unitids, years)
+
+    def searchNames(self, prefix):
+        """
+        Returns the UNITID and name of every institution that has had a name starting with prefix, ignoring case
+        @ params
+        prefix - Required - Start of the institution name
+        """
+        prefix = prefix.lower()
+        left = np.searchsorted(self._nameKeys, prefix, side="left")
+        right = np.searchsorted(self._nameKeys, prefix + "\uffff", side="left")
+        return self._names.iloc[left:right].reset_index(drop=True)
+
+
+# Reads the College Scorecard data for the given attributes and indexes it by institution
+def buildInstitutionIndex(keyAttributes=None, useCache=True, workers=None, years=None, stateCodes=None):
+    return InstitutionIndex(readCollegeScorecardDatasets(keyAttributes or [], useCache, workers, years, stateCodes))
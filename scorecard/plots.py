@@ -0,0 +1,619 @@
+# The figures of the project, and rendering them to files in batch mode
+
+import os
+import json
+import importlib
+import pandas as pd
+import numpy as np
+import math
+from functools import lru_cache
+from statistics import NormalDist
+
+from . import config
+from .config import states
+from .instrumentation import stage
+from .cache import _fileSignature, _mapParallel, cacheCollegeScorecardDatasets
+from .panel import readCollegeScorecardDatasets
+from .store import buildAggregateCube
+from .aggregate import queryStateStatistics, correlateAttributes
+from .datasets import readDataset
+from .analysis import getSchoolCounts
+
+
+# Stands in for a module that is only imported the first time one of its attributes is used. The plotting
+# and geo libraries take seconds to import, and jobs that only aggregate or count never need them
+class _LazyModule:
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+
+matplotlib = _LazyModule("matplotlib")
+sns = _LazyModule("seaborn")
+plt = _LazyModule("matplotlib.pyplot")
+mpatches = _LazyModule("matplotlib.patches")
+px = _LazyModule("plotly.express")
+gpd = _LazyModule("geopandas")
+
+
+# Used for helping format matplotlib plots
+def computeTicks(x, step=5):
+    """
+    Computes domain with given step encompassing series x
+    @ params
+    x    - Required - A list-like object of integers or floats
+    step - Optional - Tick frequency
+    """
+    xMax, xMin = math.ceil(max(x)), math.floor(min(x))
+    dMax, dMin = xMax + abs((xMax % step) - step) + (step if (xMax % step != 0) else 0), xMin - abs((xMin % step))
+    return range(dMin, dMax, step)
+
+
+# Set by renderFigures while figures are rendered in batch mode. Holds the output folder, the file formats,
+# the names of the figures the current function produces and how many of them have been saved
+_batchOutput = None
+
+
+# Shows the current matplotlib figure, or the given plotly figure. In batch mode the figure is saved to the
+# output folder under its name instead, and closed
+def _showPlot(fig=None):
+    if _batchOutput is None:
+        if fig is None:
+            plt.show()
+        else:
+            fig.show()
+        return
+
+    index = _batchOutput["count"]
+    names = _batchOutput["names"]
+    name = names[index] if index < len(names) else f"{names[0]} {index + 1}"
+    _batchOutput["count"] += 1
+
+    with stage("render", figure=name):
+        for fmt in _batchOutput["formats"]:
+            path = os.path.join(_batchOutput["folder"], f"{name}.{fmt}")
+            if fig is None:
+                plt.savefig(path, bbox_inches="tight")
+            else:
+                # Static export of plotly figures requires the kaleido package
+                fig.write_image(path)
+            _batchOutput["written"].append(path)
+
+    if fig is None:
+        plt.close("all")
+
+
+# Largest number of points drawn in a scatter plot. Denser scatters are drawn as a random sample of this many
+# points, which keeps rendering fast while fitted lines and statistics still use every point
+SCATTER_MAX_POINTS = 5000
+
+
+# Draws pre-aggregated data as one line per group straight with matplotlib, optionally with a shaded band
+# between lower and upper bounds. Unlike seaborn's lineplot, nothing is aggregated or resampled
+def _plotLines(ax, data, x, y, hue, lower=None, upper=None):
+    for key in data[hue].unique():
+        group = data[data[hue] == key]
+        line, = ax.plot(group[x], group[y], label=key)
+        if lower is not None:
+            ax.fill_between(group[x], group[lower], group[upper], color=line.get_color(), alpha=0.2, linewidth=0)
+    ax.set_xlabel(x)
+    ax.set_ylabel(y)
+    ax.legend(title=hue)
+
+
+# Computes the confidence interval of means from the standard deviation and count of the values they
+# average, using the normal approximation
+def meanInterval(mean, std, count, level=0.95):
+    """
+    Returns the lower and upper bounds of the interval
+    @ params
+    mean  - Required - Means, as a number or array
+    std   - Required - Standard deviations of the averaged values
+    count - Required - Numbers of values averaged
+    level - Optional - Confidence level
+    """
+    margin = NormalDist().inv_cdf(0.5 + level / 2) * np.asarray(std) / np.sqrt(count)
+    return mean - margin, mean + margin
+
+
+# Fits a least squares line of y on x and computes the confidence band of the fitted mean at the points of
+# grid, using the normal approximation. Replaces the bootstrap seaborn's regplot runs over every point
+def regressionBand(x, y, grid, level=0.95):
+    """
+    Returns the fitted values and the lower and upper bounds of the band at every point of grid
+    @ params
+    x     - Required - Array of x values
+    y     - Required - Array of y values
+    grid  - Required - Array of x values to evaluate the line at
+    level - Optional - Confidence level
+    """
+    x, y, grid = (np.asarray(values, dtype="float64") for values in (x, y, grid))
+    n = len(x)
+    xMean, yMean = x.mean(), y.mean()
+    sxx = ((x - xMean) ** 2).sum()
+    slope = ((x - xMean) * (y - yMean)).sum() / sxx
+    intercept = yMean - slope * xMean
+
+    residual = y - (intercept + slope * x)
+    scale = np.sqrt((residual ** 2).sum() / (n - 2))
+    margin = NormalDist().inv_cdf(0.5 + level / 2) * scale * np.sqrt(1 / n + (grid - xMean) ** 2 / sxx)
+    fitted = intercept + slope * grid
+    return fitted, fitted - margin, fitted + margin
+
+
+# Draws a scatter plot of y against x. Scatters with more than maxPoints points are drawn as a random
+# sample of them, or as hexagonal bins counting the points when hexbin is set
+def _scatterPoints(ax, x, y, maxPoints=SCATTER_MAX_POINTS, hexbin=False, seed=0, **kwargs):
+    x, y = np.asarray(x, dtype="float64"), np.asarray(y, dtype="float64")
+    if hexbin:
+        return ax.hexbin(x, y, gridsize=40, mincnt=1, cmap="Blues")
+    if maxPoints is not None and len(x) > maxPoints:
+        keep = np.random.default_rng(seed).choice(len(x), maxPoints, replace=False)
+        x, y = x[keep], y[keep]
+    return ax.scatter(x, y, **kwargs)
+
+
+# Creates a time series graph of a particular attribute. The averages are drawn as they are, optionally with
+# a confidence band computed from the standard deviation and count of each state and year
+def plotAttributeTimeSeries(attr, name, level=None):
+    # Average the attribute for every state in every year from the aggregate cube
+    averages = buildAggregateCube([attr]).query(attr, ["mean", "std", "count"]).rename(columns={"mean": name})
+    averages["Year"] = averages["Year"].astype(int)
+
+    # Get the top 10 states in terms of number of institutions in 2013
+    schools = list(getSchoolCounts(2013).keys())[:11]
+    averages = pd.concat([averages[averages["State"] == state] for state in schools])
+
+    # Format and show the plot
+    sns.set(rc={"figure.figsize": (11.7, 8.27)})
+
+    ax = plt.gca()
+    if level is None:
+        _plotLines(ax, averages, "Year", name, "State")
+    else:
+        averages["Lower"], averages["Upper"] = meanInterval(averages[name], averages["std"], averages["count"], level)
+        _plotLines(ax, averages, "Year", name, "State", "Lower", "Upper")
+    ax.legend(title="State", loc="upper left", bbox_to_anchor=(1, 1))
+    ax.set_title(name + " over time")
+
+    _showPlot()
+
+
+# Generates a bar chart for a particular attribute in a given year by aggregating the data to a
+# state level
+def barChartCollegeScorecardData(attr, name, year):
+    # Average the attribute's values for each state in the year in question, ignoring null values
+    averages = queryStateStatistics(attr, "mean", byYear=False, years=[year], wide=True)
+    averages = averages.reset_index().rename(columns={attr: name})
+
+    # Generate the bar chart and show it
+    sns.barplot(x="State", y=name, data=averages, errorbar=None).set_title(f"{name} in {year} by State")
+    _showPlot()
+
+
+# Assigns each value of an attribute to a bin, numbered from 1 for the lowest values. Bins are either
+# quantiles of the attribute or given by custom thresholds, and quantiles can be computed separately within
+# groups such as years or states. A value equal to a threshold falls in the lower bin, and missing values
+# are not assigned a bin
+def assignBins(data, attr, bins=4, thresholds=None, by=None):
+    """
+    Returns a series of bin numbers aligned with data
+    @ params
+    data       - Required - A dataframe containing attr
+    attr       - Required - The attribute to bin
+    bins       - Optional - Number of equally sized quantile bins. 4 assigns quartiles
+    thresholds - Optional - Sorted upper bounds of every bin but the last. Overrides bins
+    by         - Optional - A column or list of columns, e.g. "Year" or "STABBR", within which quantiles are
+                            computed
+    """
+    values = data[attr].astype("float64")
+
+    def binValues(values):
+        if thresholds is not None:
+            bounds = np.asarray(thresholds, dtype="float64")
+        else:
+            bounds = values.quantile(np.arange(1, bins) / bins).to_numpy()
+        result = np.searchsorted(bounds, values.to_numpy(), side="left") + 1
+        return pd.Series(result, index=values.index).where(values.notna())
+
+    if by is None or thresholds is not None:
+        binned = binValues(values)
+    else:
+        binned = values.groupby([data[col] for col in ([by] if isinstance(by, str) else by)],
+                                observed=True, group_keys=False).apply(binValues)
+    return binned.reindex(data.index).astype("Int64")
+
+
+# Creates a plot that scatter plots median debt vs median earnings data gathered in 2011
+# and segregates the data point based on which quartile of the share of black undergraduates
+# each institution belongs in. Dense scatters are sampled down to maxPoints, or drawn as hexbins
+def boxPlotBlackInst(maxPoints=SCATTER_MAX_POINTS, hexbin=False):
+    # Gathers data on share of black undergraduate students, median debt, and median earnings after graduation
+    # Only the data from 2011 is read
+    data = readCollegeScorecardDatasets(["UGDS_BLACK", "DEBT_MDN", "mn_earn_wne_p6"], years=[2011])
+    # Removes any rows where the value is privacy suppressed
+    data.replace("PrivacySuppressed", None, inplace=True)
+    data.dropna(subset=["UGDS_BLACK", "DEBT_MDN", "mn_earn_wne_p6"], inplace=True)
+    data.reset_index(inplace=True, drop=True)
+
+    # Creates a box plot based on the institutional data on black undergraduate share
+    sns.boxplot(data=data, x="UGDS_BLACK")
+    _showPlot()
+
+    # Assigns each university a quartile rank based on the quartiles of the black undergraduate share.
+    # 1 means the institution ranks in the bottom 25% in terms of black undergraduate share
+    data["Quartile"] = assignBins(data, "UGDS_BLACK", bins=4)
+
+    # Transforms the median debt and median earnings data into floating points
+    data[["DEBT_MDN", "mn_earn_wne_p6"]] = data[["DEBT_MDN", "mn_earn_wne_p6"]].astype(float)
+
+    # Creates the plot of data, where the institutions are separated based on their quartile rankings
+    quartiles = sorted(data["Quartile"].dropna().unique())
+    fig, axes = plt.subplots(1, len(quartiles), figsize=(5 * len(quartiles), 5), sharex=True, sharey=True,
+                             squeeze=False)
+    for ax, quartile in zip(axes[0], quartiles):
+        quartileData = data[data["Quartile"] == quartile]
+        _scatterPoints(ax, quartileData["DEBT_MDN"], quartileData["mn_earn_wne_p6"], maxPoints, hexbin)
+        ax.set_title(f"Quartile = {quartile}")
+        ax.set_xlabel("DEBT_MDN")
+    axes[0][0].set_ylabel("mn_earn_wne_p6")
+    _showPlot()
+
+
+# Generates a stacked bar chart for the null percent for single year attributes
+# aggregated across all data for the year of 2013
+def generateStackedBarChartOneYearAttributesNullCount():
+    # Read in institution count and null counts
+    instCountOverTime = readDataset("instiution count data", "Sheet1").set_index("State")
+    oneYearAttrNullCounts = readDataset("One Year Attributes Null Counts", "Sheet1").set_index("State")
+
+    # Initialize list of single year attributes and the year they're from
+    oneYearOnly = ["CDR3",
+                   "C150_4_WHITE", "C150_4_BLACK", "C150_4_HISP", "C150_4_ASIAN", "C150_4_NHPI",
+                   "C150_4_NRA", "C150_4_UNKN"]
+    YEAR = 2013
+
+    # Initialize transformed dataframe
+    transformedData = pd.DataFrame()
+
+    # Count how many institutions were in the US across the 50 states and DC in 2013
+    totalInst = sum(instCountOverTime[YEAR])
+    # Iterate over each attribute
+    for attr in oneYearOnly:
+        # Count how many nulls are present in total across all 50 states and DC
+        sumNulls = sum(oneYearAttrNullCounts[attr])
+
+        # Store the results in the transformed dataframe
+        transformedData.at[attr, "Null"] = sumNulls / totalInst
+        # Used to create contrasting bar for not null percent
+        transformedData.at[attr, "Not Null"] = 1
+
+    # Set the index to be the attribute
+    transformedData.reset_index(inplace=True)
+    transformedData.rename(columns={"index": "Attribute"}, inplace=True)
+
+    # Formats the resulting plot
+    matplotlib.rc("axes", labelsize=20)
+    matplotlib.rc("font", size=15)
+
+    # Creates the two bars
+    bar1 = sns.barplot(x="Attribute", y="Not Null", data=transformedData, color="blue", errorbar=None).set_title(
+        "Percent of entries with null value")
+    bar2 = sns.barplot(x="Attribute", y="Null", data=transformedData, color="red", errorbar=None)
+
+    # Provides additional formatting for the plot
+    topBar = mpatches.Patch(color="blue", label="Not Null")
+    bottomBar = mpatches.Patch(color="red", label="Null")
+    plt.legend(handles=[topBar, bottomBar])
+    plt.ylabel("Percent")
+
+    # Shows the plot
+    _showPlot()
+
+
+# Plots the null percent over time for multi-year attributes
+def timeSeriesNullPercentageForMultiYearAttributes():
+    # Read in the institution count data
+    instCountOverTime = readDataset("instiution count data", "Sheet1").set_index("State")
+
+    # Initialize list of multi-year attributes
+    multiYear = ["TUITIONFEE_IN", "TUITIONFEE_OUT", "UGDS_WHITE", "UGDS_BLACK", "UGDS_HISP", "UGDS_ASIAN"]
+
+    # Initialize transformed dataframe
+    transformedData = pd.DataFrame()
+    index = 0
+
+    # Iterate over each attribute
+    for attr in multiYear:
+        # Open the null count dataset for the attribute in question
+        data = readDataset(f"{attr} Null Counts Over Time", "Sheet1").set_index("State")
+        # Iterate over each year
+        for year in instCountOverTime.columns:
+            # Count how many institutions were in the 50 states and DC in the year in question
+            # and how many null counts were there for the attribute in question in that year
+            sumInst = sum(instCountOverTime[year])
+            totalNulls = sum(data[year])
+
+            # Store the attribute, year, and null percent in the transformed dataframe
+            transformedData.at[index, "Attribute"] = attr
+            transformedData.at[index, "Year"] = int(year)
+            transformedData.at[index, "Null Percent"] = totalNulls / sumInst
+
+            # Increment the row to move to next year
+            index += 1
+
+    # Format the plot
+    matplotlib.rc("axes", labelsize=20)
+    matplotlib.rc("font", size=15)
+
+    # Generate the plot
+    ax = plt.gca()
+    _plotLines(ax, transformedData, "Year", "Null Percent", "Attribute")
+    ax.set_title("Percent of entries with null value over time")
+
+    # Format the x ticks
+    plt.xticks(computeTicks(transformedData["Year"], step=1))
+
+    # Show the plot
+    _showPlot()
+
+
+# Generate a correlation matrix using values from the year 2013 for both single and multiyear attributes
+# Makes two correlation matrices: 1 where data is aggregated on state level, and one where data remains at
+# institutional level
+def generateCorrelationMatrix():
+    # Initialize lists of multi and single year attributes
+    multiYear = ["TUITIONFEE_IN", "TUITIONFEE_OUT", "UGDS_WHITE", "UGDS_BLACK", "UGDS_HISP", "UGDS_ASIAN"]
+    oneYearOnly = ["CDR3",
+                   "C150_4_WHITE", "C150_4_BLACK", "C150_4_HISP", "C150_4_ASIAN", "C150_4_NHPI",
+                   "C150_4_NRA", "C150_4_UNKN"]
+
+    # Generate combined list
+    attrs = multiYear + oneYearOnly
+
+    # Generate a correlation matrix from the state averages of 2013
+    corrMatrix = correlateAttributes(attrs, "state", years=[2013])
+
+    # Format and show the plot
+    f, ax = plt.subplots(figsize=(20, 20))
+
+    g = sns.heatmap(corrMatrix, ax=ax, annot=True)
+    g.set_xticklabels(g.get_xmajorticklabels(), fontsize=8)
+    g.set_yticklabels(g.get_ymajorticklabels(), fontsize=8)
+    _showPlot()
+
+    # Generate a correlation matrix from the institutions of 2013. Each pair of attributes uses every
+    # institution that has values for both, rather than only the institutions that have values for all
+    # attributes, which the sparse C150_4_NHPI and C150_4_NRA attributes would reduce to very few
+    baseCorr = correlateAttributes(attrs, "institution", years=[2013])
+
+    # Format and show the plot
+    f, ax = plt.subplots(figsize=(20, 20))
+    g = sns.heatmap(baseCorr, ax=ax, annot=True)
+    g.set_xticklabels(g.get_xmajorticklabels(), fontsize=8)
+    g.set_yticklabels(g.get_ymajorticklabels(), fontsize=8)
+    _showPlot()
+
+
+# Loads the boundaries of the 50 states and DC as GeoJSON, with the polygons simplified to the given
+# tolerance. The shapefile is only read the first time a tolerance is used: the simplified geometry is saved
+# to the cache folder, keyed by the shapefile's size and modification time, and kept in memory for the rest
+# of the session
+@lru_cache(maxsize=None)
+def loadStateGeometry(tolerance=config.GEOMETRY_TOLERANCE, shapefile=None):
+    """
+    Returns the state boundaries as a GeoJSON dictionary whose features are identified by state abbreviation
+    @ params
+    tolerance - Optional - Distance, in degrees, that simplified boundaries may deviate from the originals
+    shapefile - Optional - Path to the shapefile. Defaults to STATE_SHAPEFILE
+    """
+    shapefile = shapefile or config.STATE_SHAPEFILE
+    signature = _fileSignature(shapefile)
+
+    root = os.path.join(config.CACHE_FOLDER, "geometry")
+    path = os.path.join(root, f"states-{signature['size']}-{int(signature['mtime'])}-{tolerance}.geojson")
+    if not os.path.exists(path):
+        # Reads in a shape file used to structure the geoplot, and only keeps the 50 states and DC
+        statesDF = gpd.read_file(shapefile)
+        statesDF = statesDF.loc[statesDF["STUSPS"].isin(states), ["STUSPS", "NAME", "geometry"]]
+        statesDF["geometry"] = statesDF.geometry.simplify(tolerance, preserve_topology=True)
+
+        os.makedirs(root, exist_ok=True)
+        with open(path, "w") as f:
+            f.write(statesDF.to_json())
+
+    with open(path) as f:
+        return json.load(f)
+
+
+# Generates geo plot given a dataset (or spreadsheet), sheetname, attribute, and name
+def generateGeoPlot(sourceData, attr, sheetname, title, tolerance=config.GEOMETRY_TOLERANCE):
+    # Reads in the simplified state boundaries used to structure the geoplot
+    geometry = loadStateGeometry(tolerance)
+
+    # Reads in the data in the dataset
+    data = readDataset(sourceData, sheetname)
+
+    # Generates the chloropleth map, matching each state to its boundary by its abbreviation
+    fig = px.choropleth(data, locations="State", geojson=geometry, featureidkey="properties.STUSPS",
+                        color=attr, scope="usa", title=title, color_continuous_scale="rdbu_r")
+    # Shows the plot. Unlike matplotlib, the maps are generated in browser
+    _showPlot(fig)
+
+
+# Creates a plot that charts the percent of students in debt each year on a bar chart, and the total enrollment
+# of students on a line chart
+def createIntroVizz():
+    data = pd.read_excel("Visualization Datasets/student debt percent, enrollment, and per capita debt.xlsx",
+                         sheet_name="main")
+
+    matplotlib.rc_file_defaults()
+    ax1 = sns.set_style(style=None, rc=None)
+
+    fig, ax1 = plt.subplots(figsize=(12, 6))
+
+    sns.lineplot(data=data["Total Enrollment"], marker="o", sort=False, ax=ax1, color="red", errorbar=None)
+    ax1.set_ylabel("Total Enrollment (millions)")
+    ax1.set_xlabel("Year")
+    ax2 = ax1.twinx()
+
+    sns.barplot(data=data, x="Year", y="Student Debt Percentage", alpha=0.5, ax=ax2, color="blue", errorbar=None)
+    ax2.set_ylabel("Percent of Students in Debt")
+
+    _showPlot()
+
+
+# Creates a scatter plot which shows the relationship between four year completion percentage and default rate.
+# The regression line is fitted to every institution, with an analytic confidence band at the given level,
+# while dense scatters are sampled down to maxPoints or drawn as hexbins
+def createRaceVCompletionScatterPlots(level=0.95, maxPoints=SCATTER_MAX_POINTS, hexbin=False):
+    root = "C150_4_"
+    attrs = ["WHITE", "BLACK", "ASIAN"]
+
+    # Creates list of attributes for four year completion percentage for white, asian, and black students
+    names = []
+    for race in attrs:
+        names.append(root + race)
+
+    # Read in the completion data and default rate data from 2013
+    # Also drop institutions that contain any null values for any of the attributes in question
+    data = readCollegeScorecardDatasets(names + ["CDR3"], years=[2013]).dropna(subset=names + ["CDR3"])
+
+    # Iterate over each race and generate the scatter plot
+    for race in attrs:
+        x, y = data[root + race].astype(float), data["CDR3"].astype(float)
+        fig, ax = plt.subplots()
+        _scatterPoints(ax, x, y, maxPoints, hexbin, marker="+")
+        if len(data) > 2:
+            grid = np.linspace(x.min(), x.max(), 100)
+            fitted, lower, upper = regressionBand(x, y, grid, level)
+            ax.plot(grid, fitted, color="red")
+            ax.fill_between(grid, lower, upper, color="red", alpha=0.15, linewidth=0)
+        ax.set_xlabel(f"4 year completion percentage: {race.lower()} students")
+        ax.set_ylabel("Default Rate")
+        _showPlot()
+
+
+# Generates a histogram for an attribute's values in a given year
+def histogramGenerator(attr, year):
+    # Read in the attribute's data for the given year only
+    data = readCollegeScorecardDatasets([attr], years=[year])
+
+    # Generate the histogram. By default, seaborn excludes any null values
+    # Also generates a kde line, which also shows the distribution data
+    ax = sns.histplot(data=data, x=attr, kde=True, stat="count", bins=25)
+    ax.lines[0].set_color("crimson")
+    ax.set_xlabel("Default Rate")
+    ax.set_title("Histogram of default rates across universities")
+    _showPlot()
+
+
+# The figures in the repository, as specs for renderFigures. Each spec names the plotting function, its
+# arguments, and the names of the figures it produces in order. Specs of figures drawn from the aggregate
+# cube also list the attributes they query, so the cube is built before the figures are rendered in parallel.
+# Specs of figures drawn from the College Scorecard datasets list the years they read in "scorecardYears", where
+# None is every year, so those years are cached before rendering
+DEFAULT_FIGURES = [
+    {"function": "plotAttributeTimeSeries", "args": ["TUITIONFEE_IN", "In state tuition"],
+     "names": ["in state tuition over time"], "cube": ["TUITIONFEE_IN", "PBI"], "scorecardYears": None},
+    {"function": "plotAttributeTimeSeries", "args": ["TUITIONFEE_OUT", "Out of state tuition"],
+     "names": ["out of state tuition over time"], "cube": ["TUITIONFEE_OUT", "PBI"], "scorecardYears": None},
+    {"function": "barChartCollegeScorecardData", "args": ["CDR3", "Default rate", 2013],
+     "names": ["default rate by state 2013"], "cube": ["CDR3"], "scorecardYears": None},
+    {"function": "histogramGenerator", "args": ["CDR3", 2013],
+     "names": ["default rate 2013 historgram"], "scorecardYears": [2013]},
+    {"function": "boxPlotBlackInst", "args": [],
+     "names": ["box plot UGDS_SHARE", "median debt vs median income grouped by black quartile"],
+     "scorecardYears": [2011]},
+    {"function": "generateCorrelationMatrix", "args": [],
+     "names": ["state correlation matrix", "college correlation matrix"], "scorecardYears": [2013]},
+    {"function": "createRaceVCompletionScatterPlots", "args": [],
+     "names": ["white 4 year completion percentage vs default rate",
+               "black 4 year completion percentage vs default rate",
+               "asian 4 year completion percentage vs default rate"], "scorecardYears": [2013]},
+    {"function": "generateStackedBarChartOneYearAttributesNullCount", "args": [],
+     "names": ["one year attributes null count percent"]},
+    {"function": "timeSeriesNullPercentageForMultiYearAttributes", "args": [],
+     "names": ["multi year attributes null count percent over time"]},
+    {"function": "generateGeoPlot",
+     "args": ["in and out tuition fees", "TUITIONFEE_IN", "main", "In state tuition in 2013"],
+     "names": ["in state tuition 2013 map"]},
+    {"function": "generateGeoPlot",
+     "args": ["in and out tuition fees", "TUITIONFEE_OUT", "main",
+              "Out of state tuition in 2013"],
+     "names": ["out of state tuition 2013 map"]},
+    {"function": "generateGeoPlot",
+     "args": ["black inst and default rate", "CDR3", "main", "Default rate in 2013"],
+     "names": ["default rate by state 2013 map"]},
+    {"function": "generateGeoPlot",
+     "args": ["race and completion", "C150_4_WHITE", "main", "4 year completion percentage of white students"],
+     "names": ["white 4 year completion percentage"]},
+    {"function": "generateGeoPlot",
+     "args": ["race and completion", "C150_4_BLACK", "main", "4 year completion percentage of black students"],
+     "names": ["black 4 year completion percentage"]},
+    {"function": "generateGeoPlot",
+     "args": ["race and completion", "C150_4_ASIAN", "main", "4 year completion percentage of asian students"],
+     "names": ["asian 4 year completion percentage"]},
+    {"function": "createIntroVizz", "args": [],
+     "names": ["student debt percent and enrollment"]},
+]
+
+
+# Looks up the spec of DEFAULT_FIGURES that produces the named figure
+def _figureSpec(name):
+    for spec in DEFAULT_FIGURES:
+        if name in spec["names"]:
+            return spec
+    raise KeyError(f"No figure is named {name!r}")
+
+
+# Renders the figures of a single spec in batch mode and returns the paths of the files written
+def _renderFigure(spec, folder, formats):
+    global _batchOutput
+
+    # Figures rendered in the calling process switch its backend only while they are drawn
+    backend = matplotlib.get_backend()
+    matplotlib.use("Agg")
+    _batchOutput = {"folder": folder, "formats": formats, "names": spec["names"], "count": 0, "written": []}
+    try:
+        globals()[spec["function"]](*spec.get("args", []), **spec.get("kwargs", {}))
+        return _batchOutput["written"]
+    finally:
+        _batchOutput = None
+        matplotlib.use(backend)
+
+
+# Renders a list of figures without displaying them, using the non-interactive Agg backend, and saves each
+# one to the output folder in every requested format. The Scorecard Parquet cache of the years the figures
+# read is brought up to date first so that the figures share one parse of the raw data, then the specs are
+# rendered across a pool of worker processes
+def renderFigures(specs=None, folder="Figures", formats=("png",), workers=None):
+    """
+    Renders figures in batch mode and returns the paths of the files written
+    @ params
+    specs   - Optional - A list of figure specs, see DEFAULT_FIGURES. Defaults to every figure in the repository
+    folder  - Optional - Folder the figures are saved to
+    formats - Optional - File formats to save, e.g. ("png", "svg")
+    workers - Optional - Number of processes used to render the figures
+    """
+    specs = DEFAULT_FIGURES if specs is None else specs
+    formats = list(formats)
+    os.makedirs(folder, exist_ok=True)
+
+    # Figures drawn from other datasets do not need the Scorecard datasets at all
+    needed = [spec["scorecardYears"] for spec in specs if spec.get("scorecardYears", []) != []]
+    if needed and os.path.isdir(config.SCORECARD_FOLDER):
+        years = None if None in needed else sorted({year for years in needed for year in years})
+        cacheCollegeScorecardDatasets(workers=workers, years=years)
+        # Build the aggregate cube for every attribute the figures query once, before the workers start
+        attrs = list(dict.fromkeys(attr for spec in specs for attr in spec.get("cube", [])))
+        if attrs:
+            buildAggregateCube(attrs)
+
+    written = _mapParallel(_renderFigure, specs, [folder] * len(specs), [formats] * len(specs), workers=workers)
+    return [path for paths in written for path in paths]
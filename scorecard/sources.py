@@ -0,0 +1,218 @@
+# Readers of the FRED series and of the other registered source datasets
+
+import os
+import json
+import datetime
+import pandas as pd
+
+from . import config
+from .cache import _readCached
+
+
+# Parses a series downloaded from FRED. The sheet starts with a block of notes, so the header row is found
+# by searching the first column for "observation_date" in one pass
+def _parseFREDSeries(path):
+    sheet = pd.read_excel(path, sheet_name="FRED Graph", header=None)
+
+    header = sheet.index[sheet[0].eq("observation_date")][0]
+    series = sheet.iloc[header + 1:, :2].copy()
+    series.columns = ["Observation", sheet.at[header, 1]]
+
+    series["Observation"] = pd.to_datetime(series["Observation"])
+    series[series.columns[1]] = pd.to_numeric(series[series.columns[1]])
+    return series.set_index("Observation")
+
+
+# Reads the FRED series in the FRED Data folder and aligns them into a single dataframe indexed by
+# observation date, with one column per series. Dates a series has no observation for are left missing
+def readFREDdata(series=None, folder=None, useCache=True):
+    """
+    Returns the FRED series as one dataframe
+    @ params
+    series   - Optional - A series ID or list of series IDs, e.g. "SLOAS". Defaults to every file in folder
+    folder   - Optional - Folder containing the .xls files. Defaults to FRED_FOLDER
+    useCache - Optional - Whether parsed series may be read from and saved to the Parquet cache
+    """
+    folder = folder or config.FRED_FOLDER
+    if series is None:
+        series = sorted(os.path.splitext(file)[0] for file in os.listdir(folder) if file.endswith(".xls"))
+    elif not isinstance(series, list):
+        series = [series]
+
+    frames = [_readCached(os.path.join(folder, name + ".xls"), _parseFREDSeries, "fred", useCache)
+              for name in series]
+    return pd.concat(frames, axis=1).sort_index()
+
+
+# Folders of spreadsheets registered in the source catalog by default, with the layout used to parse every
+# file in them. Statista keeps its values in a "Data" sheet below a title block, the NYFed and StudentAid.gov
+# sheets have a title block of varying length above their header (and NYFed workbooks often start with a
+# table of contents), and the Dataworld files are plain CSVs
+SOURCE_FOLDERS = {
+    "NYFed Microeconomic Data": {"sheet": "auto", "header": "auto"},
+    "StudentAid.gov Data": {"header": "auto"},
+    "Statista": {"sheet": "Data", "header": None, "skiprows": 4},
+    "Dataworld": {"header": 0, "thousands": ","},
+}
+
+# Names of the leading sheets skipped by sheet="auto": contents pages, readmes and license text that come
+# before the data in most NYFed workbooks. Names are compared after stripping and lowercasing
+FRONT_MATTER_SHEETS = ["toc", "contents", "table of contents", "overview", "notes", "readme", "read me", "info",
+                       "cover sheet", "disclaimer", "license"]
+
+# Layouts of sources whose data the folder defaults cannot find. The PEPS school list has its header in the
+# first row but no numeric columns for header detection to key on, the change in debt workbook keeps the
+# latest year on its fourth sheet, and the negative wealth workbook starts with several pages of legal text
+SOURCE_LAYOUTS = {
+    "StudentAid.gov Data/peps300": {"path": "StudentAid.gov Data/peps300.xlsx", "header": 0, "dtype": str},
+    "NYFed Microeconomic Data/FRBNY-change-in-debt-data": {
+        "path": "NYFed Microeconomic Data/FRBNY-change-in-debt-data.xlsx", "sheet": "2012Q4 to 2013Q4 by CreditScore"},
+    "NYFed Microeconomic Data/NegWealthChartData": {
+        "path": "NYFed Microeconomic Data/NegWealthChartData.xlsx", "sheet": "Figure 1"},
+}
+
+# Maps the name of each registered source to its path and layout
+sourceCatalog = {}
+
+
+# Registers a spreadsheet or CSV in the source catalog
+def registerSource(name, path, sheet=0, header="auto", skiprows=None, **options):
+    """
+    Records how a source is parsed so that it can be loaded by name with loadSource
+    @ params
+    name     - Required - Name the source is loaded by
+    path     - Required - Path to the .xls, .xlsx or .csv file
+    sheet    - Optional - Sheet name or index, or "auto" to skip leading sheets named in FRONT_MATTER_SHEETS.
+                          Ignored for CSV files
+    header   - Optional - Row (after skiprows) holding the column names, None if there is none, or "auto" to use
+                          the block of text rows directly above the first row of numbers
+    skiprows - Optional - Number of rows to skip at the top of the sheet
+    options  - Optional - Further keyword arguments passed to pd.read_excel or pd.read_csv
+    """
+    sourceCatalog[name] = {"path": path, "sheet": sheet, "header": header, "skiprows": skiprows, **options}
+
+
+# Registers every file in SOURCE_FOLDERS, named by its folder and filename without extension. Sources that
+# were registered explicitly keep their layout
+def _registerDefaultSources():
+    for name, layout in SOURCE_LAYOUTS.items():
+        if name not in sourceCatalog and os.path.exists(layout["path"]):
+            registerSource(name, **layout)
+
+    for folder, layout in SOURCE_FOLDERS.items():
+        if not os.path.isdir(folder):
+            continue
+        for file in sorted(os.listdir(folder)):
+            stem, extension = os.path.splitext(file)
+            name = folder + "/" + stem
+            if extension in [".xls", ".xlsx", ".csv"] and name not in sourceCatalog:
+                registerSource(name, os.path.join(folder, file), **layout)
+
+
+# Lists the names of every registered source
+def listSources():
+    _registerDefaultSources()
+    return sorted(sourceCatalog)
+
+
+# Cleans a parsed source: empty rows and columns are dropped, column names become unique strings, and
+# columns are converted to numbers where every value is numeric. Remaining text columns hold strings only so
+# that the frame can be stored as Parquet
+def _normalizeSource(data):
+    data = data.dropna(how="all").dropna(axis=1, how="all").reset_index(drop=True)
+
+    names = []
+    for i, col in enumerate(data.columns):
+        name = f"Column {i}" if pd.isna(col) or str(col).startswith("Unnamed:") else " ".join(str(col).split())
+        while name in names:
+            name += "_"
+        names.append(name)
+    data.columns = names
+
+    for col in data.columns:
+        if data[col].dtype == object:
+            try:
+                data[col] = pd.to_numeric(data[col])
+            except (TypeError, ValueError):
+                data[col] = data[col].where(data[col].isna(), data[col].astype(str))
+    return data
+
+
+# Finds the header of a sheet read without one. Data starts at the first row where most cells hold numbers
+# or dates, and the header is the block of non-empty rows directly above it. Headers spanning several rows,
+# such as a group name above each column name, are joined into one name per column
+def _detectHeader(sheet):
+    isNumber = sheet.apply(lambda col: col.map(lambda value: isinstance(value, (int, float, datetime.date))
+                                               and not isinstance(value, bool) and not pd.isna(value)))
+    numeric = isNumber.sum(axis=1) > sheet.notna().sum(axis=1) / 2
+    if not numeric.any():
+        return None, sheet
+
+    first = int(numeric.to_numpy().argmax())
+    top = first
+    while top > 0 and sheet.iloc[top - 1].notna().any():
+        top -= 1
+    if top == first:
+        return None, sheet.iloc[first:]
+
+    # Group names usually only fill the first cell they span, so they are carried to the right
+    block = sheet.iloc[top:first].ffill(axis=1) if first - top > 1 else sheet.iloc[top:first]
+    names = [" ".join(str(value) for value in block[col] if not pd.isna(value)) for col in block.columns]
+    return names, sheet.iloc[first:]
+
+
+# Parses a source according to its layout
+def _parseSource(layout):
+    options = {key: value for key, value in layout.items() if key not in ["path", "sheet", "header", "skiprows"]}
+    path, header = layout["path"], layout["header"]
+
+    if path.endswith(".csv"):
+        data = pd.read_csv(path, header=0 if header == "auto" else header, skiprows=layout["skiprows"], **options)
+        return _normalizeSource(data)
+
+    sheetName = layout["sheet"]
+    if sheetName == "auto":
+        names = pd.ExcelFile(path).sheet_names
+        content = [name for name in names if name.strip().lower() not in FRONT_MATTER_SHEETS]
+        sheetName = (content or names)[0]
+
+    try:
+        sheet = pd.read_excel(path, sheet_name=sheetName, header=None, skiprows=layout["skiprows"], **options)
+    except AssertionError as error:
+        # xlrd asserts on .xls files whose shared string table does not match its declared size
+        raise ValueError(f"{path} is a corrupt .xls file that xlrd cannot read; re-save it as .xlsx") from error
+    sheet = sheet.reset_index(drop=True)
+    if header == "auto":
+        names, data = _detectHeader(sheet)
+        # A row of numbers far down a text sheet, such as a footnote, would otherwise be taken for the data
+        total, kept = sheet.notna().any(axis=1).sum(), data.notna().any(axis=1).sum()
+        if kept < total / 2:
+            raise ValueError(f"Header detection kept {kept} of the {total} rows of {path} (sheet {sheetName!r}); "
+                             "register the source with an explicit header")
+    elif header is None:
+        names, data = None, sheet
+    else:
+        names, data = list(sheet.iloc[header]), sheet.iloc[header + 1:]
+
+    if names is not None:
+        data = data.set_axis(names, axis=1)
+    return _normalizeSource(data)
+
+
+# Loads a registered source as a normalized dataframe. The spreadsheet is parsed once and the result is
+# cached as Parquet, keyed by the hash of the file and its layout
+def loadSource(name, useCache=True):
+    """
+    Returns the parsed contents of a source in the catalog
+    @ params
+    name     - Required - Name of the source, see listSources
+    useCache - Optional - Whether the parsed source may be read from and saved to the Parquet cache
+    """
+    if name not in sourceCatalog:
+        _registerDefaultSources()
+    if name not in sourceCatalog:
+        raise KeyError(f"Unknown source {name!r}")
+
+    layout = sourceCatalog[name]
+    return _readCached(layout["path"], lambda path: _parseSource(layout), "sources", useCache,
+                       variant=json.dumps(layout, sort_keys=True, default=str))
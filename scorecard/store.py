@@ -0,0 +1,405 @@
+# The memory-mapped column store of numeric Scorecard attributes, and the aggregate cube built on it
+
+import os
+import json
+import pandas as pd
+import numpy as np
+
+from . import config
+from .config import states
+from .instrumentation import stage
+from .cache import (scorecardFiles, _fileSignature, _writeAtomically, _writeArray, _writeJson, _fileLock,
+                    _freshScorecardManifest)
+from .panel import scorecardDtypes, _readScorecardYear, _includedStates
+
+
+# On-disk store of numeric College Scorecard attributes. Every attribute is one contiguous .npy file over
+# the rows of all years, and the rows share one index of year, state, UNITID and row in the yearly dataset.
+# Rows are ordered by year, then state, then UNITID, so the rows of a year, a state within a year, or a run
+# of consecutive years are a contiguous slice. Columns are opened memory-mapped: processes that open the
+# same store share its pages, and only the columns (and rows) that are used are read from disk
+class ColumnStore:
+    """
+    Memory-mapped numeric column store
+    @ params
+    folder - Optional - Folder of the store. Defaults to the "columns" folder of the cache
+    """
+
+    def __init__(self, folder=None):
+        self.folder = folder or _columnStoreFolder()
+        with open(os.path.join(self.folder, "store.json")) as f:
+            self.manifest = json.load(f)
+        self._index = {name: np.load(os.path.join(self.folder, f"_{name}.npy"), mmap_mode="r")
+                       for name in ["year", "state", "unitid"]}
+        # Position of the first row of every (year, state) pair, in order of year and then state, followed
+        # by the number of rows. The rows of a pair run up to the first row of the next pair
+        self._offsets = np.load(os.path.join(self.folder, "_offsets.npy"), mmap_mode="r")
+
+    # Only the folder is pickled, so a store passed to worker processes maps the same files instead of
+    # sending them a copy of the data
+    def __reduce__(self):
+        return ColumnStore, (self.folder,)
+
+    @property
+    def attrs(self):
+        return list(self.manifest["columns"])
+
+    def __len__(self):
+        return self.manifest["rows"]
+
+    # Contiguous slices of rows in the given years and states, with adjacent slices joined together. Rows are
+    # returned in the order of the store, by year and then state, whatever order the filters list them in
+    def _slices(self, years=None, stateCodes=None):
+        if years is None and stateCodes is None:
+            return [slice(0, len(self))]
+        years = self.manifest["years"] if years is None else (years if isinstance(years, list) else [years])
+        codes = sorted({states.index(state) for state in _includedStates(stateCodes)})
+
+        slices = []
+        for year in sorted(years):
+            if year not in self.manifest["years"]:
+                continue
+            for code in codes:
+                key = self.manifest["years"].index(year) * len(states) + code
+                start, stop = int(self._offsets[key]), int(self._offsets[key + 1])
+                if start == stop:
+                    continue
+                if slices and slices[-1].stop == start:
+                    slices[-1] = slice(slices[-1].start, stop)
+                else:
+                    slices.append(slice(start, stop))
+        return slices
+
+    def _take(self, values, slices):
+        if len(slices) == 1:
+            # A single run of rows is returned as a view of the memory-mapped file, without copying
+            return values[slices[0]]
+        return np.concatenate([values[part] for part in slices] + [values[:0]])
+
+    def column(self, attr, years=None, stateCodes=None):
+        """
+        Returns the values of an attribute as a NumPy array. Missing values are NaN
+        @ params
+        attr       - Required - The attribute
+        years      - Optional - A year or list of years to keep. Defaults to every year in the store
+        stateCodes - Optional - A state abbreviation or list of state abbreviations to keep
+        """
+        if attr not in self.manifest["columns"]:
+            raise KeyError(f"{attr} is not in the column store. Add it with buildColumnStore")
+        values = np.load(os.path.join(self.folder, f"{attr}.npy"), mmap_mode="r")
+        return self._take(values, self._slices(years, stateCodes))
+
+    def index(self, years=None, stateCodes=None):
+        """
+        Returns the UNITID, STABBR and Year of the rows as a dataframe
+        @ params
+        years      - Optional - A year or list of years to keep. Defaults to every year in the store
+        stateCodes - Optional - A state abbreviation or list of state abbreviations to keep
+        """
+        slices = self._slices(years, stateCodes)
+        return pd.DataFrame({
+            "UNITID": self._take(self._index["unitid"], slices),
+            "STABBR": pd.Categorical.from_codes(self._take(self._index["state"], slices), states),
+            "Year": pd.Categorical(self._take(self._index["year"], slices), categories=self.manifest["years"],
+                                   ordered=True),
+        })
+
+    def frame(self, attrs, years=None, stateCodes=None):
+        """
+        Returns the attributes with UNITID, STABBR and Year as a dataframe, like readCollegeScorecardDatasets
+        @ params
+        attrs      - Required - An attribute name or list of attribute names
+        years      - Optional - A year or list of years to keep. Defaults to every year in the store
+        stateCodes - Optional - A state abbreviation or list of state abbreviations to keep
+        """
+        if not isinstance(attrs, list):
+            attrs = [attrs]
+        data = self.index(years, stateCodes)
+        for attr in attrs:
+            data[attr] = self.column(attr, years, stateCodes)
+        return data
+
+
+# Folder of the memory-mapped column store
+def _columnStoreFolder():
+    return os.path.join(config.CACHE_FOLDER, "columns")
+
+
+# Type an attribute is stored as. Rates and shares stay 32-bit floats, and everything else, including
+# integers that may be missing, is stored as 64-bit floats, which represent 32-bit integers exactly
+def _columnStoreDtype(attr):
+    return "float32" if scorecardDtypes([attr]).get(attr) == "float32" else "float64"
+
+
+# Builds or extends the column store with the given attributes, and returns it opened. The index is rebuilt,
+# and every column rewritten, when the yearly datasets or years differ from the ones the store was built from.
+# Otherwise only attributes that are not in the store yet are written. Each yearly dataset is read one at a
+# time, so building the store never holds more than a year of data in memory
+def buildColumnStore(keyAttributes, folder=None, years=None, useCache=True):
+    """
+    Writes numeric attributes to the column store and returns the store
+    @ params
+    keyAttributes - Required - An attribute name or list of attribute names
+    folder        - Optional - Folder of the store. Defaults to the "columns" folder of the cache
+    years         - Optional - A year or list of years to store. Defaults to every year
+    useCache      - Optional - Whether yearly datasets may be read from the Parquet cache
+    """
+    if not isinstance(keyAttributes, list):
+        keyAttributes = [keyAttributes]
+    text = [attr for attr, dtype in scorecardDtypes(keyAttributes).items()
+            if isinstance(dtype, pd.CategoricalDtype) or dtype == "category"]
+    if text:
+        raise ValueError(f"{text} are not numeric attributes and cannot be added to the column store")
+    folder = folder or _columnStoreFolder()
+    paths = scorecardFiles(years=years)
+    sources = {os.path.basename(path): _fileSignature(path) for path in paths.values()}
+    manifest = _freshScorecardManifest(paths.values()) if useCache else {}
+    entries = {year: manifest.get(os.path.basename(path)) for year, path in paths.items()}
+
+    # Processes building the store at the same time wait for each other, so the store is only written once
+    with _fileLock(os.path.join(folder, "store.lock")):
+        storeManifest = None
+        if os.path.exists(os.path.join(folder, "store.json")):
+            with open(os.path.join(folder, "store.json")) as f:
+                storeManifest = json.load(f)
+
+        with stage("columnStore", columns=len(keyAttributes)) as record:
+            if (storeManifest is None or storeManifest["sources"] != sources or
+                    not os.path.exists(os.path.join(folder, "_offsets.npy"))):
+                os.makedirs(folder, exist_ok=True)
+                # Index every year: the rows of the 50 states and DC ordered by state and UNITID, along with the
+                # position of each row in its yearly dataset
+                parts = []
+                for year, path in paths.items():
+                    ids = _readScorecardYear(path, ["STABBR", "UNITID"], entries[year])
+                    codes = ids["STABBR"].cat.codes.to_numpy()
+                    unitids = ids["UNITID"].to_numpy(dtype="int64", na_value=-1)
+                    rows = np.flatnonzero(codes >= 0)
+                    rows = rows[np.lexsort((unitids[rows], codes[rows]))]
+                    parts.append((year, codes[rows], unitids[rows], rows))
+
+                index = {"year": np.concatenate([np.full(len(rows), year, dtype="int16")
+                                                 for year, _, _, rows in parts]),
+                         "state": np.concatenate([codes for _, codes, _, _ in parts]).astype("int8"),
+                         "unitid": np.concatenate([unitids for _, _, unitids, _ in parts]).astype("int32"),
+                         "row": np.concatenate([rows for _, _, _, rows in parts]).astype("int32")}
+                # Rows of every (year, state) pair start where the rows of the previous pair end
+                yearIndex = np.repeat(np.arange(len(parts)), [len(rows) for _, _, _, rows in parts])
+                counts = np.bincount(yearIndex * len(states) + index["state"], minlength=len(parts) * len(states))
+                index["offsets"] = np.r_[0, np.cumsum(counts)].astype("int64")
+
+                # Other processes may have the previous index memory-mapped, so it is replaced rather than
+                # overwritten
+                for name, values in index.items():
+                    _writeAtomically(os.path.join(folder, f"_{name}.npy"),
+                                     lambda path, values=values: _writeArray(path, values))
+
+                storeManifest = {"sources": sources, "years": list(paths), "rows": len(index["year"]), "columns": {}}
+                missing = keyAttributes
+            else:
+                missing = [attr for attr in keyAttributes if attr not in storeManifest["columns"]]
+
+            if missing:
+                rowsByYear = {}
+                yearsIndex = np.load(os.path.join(folder, "_year.npy"))
+                rowIndex = np.load(os.path.join(folder, "_row.npy"))
+                for year in paths:
+                    start, stop = np.searchsorted(yearsIndex, [year, year + 1])
+                    rowsByYear[year] = (start, stop, rowIndex[start:stop])
+
+                # Read each year once for all missing attributes, and write the values into every column file
+                temporary = {attr: os.path.join(folder, f"{attr}.npy.{os.getpid()}.tmp") for attr in missing}
+                columns = {attr: np.lib.format.open_memmap(temporary[attr], mode="w+",
+                                                           dtype=_columnStoreDtype(attr),
+                                                           shape=(storeManifest["rows"],))
+                           for attr in missing}
+                for year, path in paths.items():
+                    start, stop, rows = rowsByYear[year]
+                    data = _readScorecardYear(path, missing, entries[year])
+                    for attr, values in columns.items():
+                        try:
+                            values[start:stop] = data[attr].to_numpy(dtype="float64", na_value=np.nan)[rows]
+                        except (TypeError, ValueError):
+                            raise ValueError(f"{attr} holds values that are not numeric in {os.path.basename(path)}, "
+                                             f"so it cannot be added to the column store")
+                # A column file is only moved into place once it is complete and no longer mapped
+                for attr in missing:
+                    values = columns.pop(attr)
+                    values.flush()
+                    del values
+                    os.replace(temporary[attr], os.path.join(folder, f"{attr}.npy"))
+                    storeManifest["columns"][attr] = _columnStoreDtype(attr)
+
+            _writeAtomically(os.path.join(folder, "store.json"), lambda path: _writeJson(path, storeManifest))
+            record["rows"] = storeManifest["rows"]
+
+        return ColumnStore(folder)
+
+
+# Statistics stored for every attribute, state and year of the aggregate cube: the number of institutions,
+# the number of non-null values, and the sum, sum of squares, minimum and maximum of the values
+CUBE_STATS = ["size", "count", "sum", "sumsq", "min", "max"]
+
+
+# Statistics of attributes by state and year, materialized from the column store. Any grouping coarser than
+# state and year, such as national totals or totals over all years, is rolled up from the cells, and means,
+# variances and null percentages are derived from the rolled up sums
+class AggregateCube:
+    """
+    State by year aggregate cube
+    @ params
+    cells - Required - A dataframe with Attribute, State and Year columns and a column for every statistic
+                       in CUBE_STATS
+    """
+
+    def __init__(self, cells):
+        self.cells = cells
+
+    def query(self, attrs, stats="mean", byState=True, byYear=True, years=None, stateCodes=None, wide=False):
+        """
+        Computes statistics of attributes by state and year from the cube, in the layout of aggregateByState
+        @ params
+        attrs      - Required - An attribute name or list of attribute names
+        stats      - Optional - A statistic name or list of statistic names: any of CUBE_STATS, "nulls",
+                                "nullPercent", "mean", "var" and "std"
+        byState    - Optional - Whether to group by state. Otherwise the states are rolled up
+        byYear     - Optional - Whether to group by year. Otherwise the years are rolled up
+        years      - Optional - A year or list of years to include. Defaults to every year
+        stateCodes - Optional - A state abbreviation or list of state abbreviations to include
+        wide       - Optional - Return one column per attribute (and statistic) instead of a tidy dataframe
+        """
+        if not isinstance(attrs, list):
+            attrs = [attrs]
+        if not isinstance(stats, list):
+            stats = [stats]
+        unknown = [stat for stat in stats if stat not in CUBE_STATS + ["nulls", "nullPercent", "mean", "var", "std"]]
+        if unknown:
+            raise ValueError(f"Statistics {unknown} cannot be computed from the cube")
+        missing = [attr for attr in attrs if attr not in set(self.cells["Attribute"])]
+        if missing:
+            raise KeyError(f"{missing} are not in the cube. Add them with buildAggregateCube")
+
+        cells = self.cells[self.cells["Attribute"].isin(attrs) & self.cells["State"].isin(_includedStates(stateCodes))]
+        if years is not None:
+            cells = cells[cells["Year"].isin(years if isinstance(years, list) else [years])]
+
+        # Roll the cells up to the requested grouping
+        keys = ["Attribute"] + (["State"] if byState else []) + (["Year"] if byYear else [])
+        result = cells.groupby(keys, sort=False).agg(
+            size=("size", "sum"), count=("count", "sum"), sum=("sum", "sum"), sumsq=("sumsq", "sum"),
+            min=("min", "min"), max=("max", "max"))
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            result["nulls"] = result["size"] - result["count"]
+            result["nullPercent"] = result["nulls"] / result["size"]
+            result["mean"] = result["sum"] / result["count"]
+            result["var"] = ((result["sumsq"] - result["sum"] ** 2 / result["count"]) /
+                             (result["count"] - 1)).where(result["count"] > 1)
+            result["std"] = np.sqrt(result["var"])
+
+        result = result[stats]
+        result[[stat for stat in stats if stat in ["size", "count", "nulls"]]] = \
+            result[[stat for stat in stats if stat in ["size", "count", "nulls"]]].astype(int)
+        result = result.reindex(attrs, level="Attribute") if len(keys) > 1 else result.reindex(attrs)
+
+        if not wide or len(keys) == 1:
+            return result.reset_index()
+        result = result.unstack("Attribute")
+        result = result.reorder_levels([1, 0], axis=1)[[(attr, stat) for attr in attrs for stat in stats]]
+        result.columns.names = [None, None]
+        if len(stats) == 1:
+            result.columns = result.columns.droplevel(1)
+        return result
+
+
+# Folder the aggregate cube is persisted to
+def _aggregateCubeFolder():
+    return os.path.join(config.CACHE_FOLDER, "cube")
+
+
+# Computes the cube cells of the given attributes from the column store. The rows of every year and state
+# are a contiguous run in the store, so each statistic is a single reduction over the runs
+def _computeCubeCells(store, attrs):
+    index = store.index()
+    keys = index["Year"].astype("int64").to_numpy() * len(states) + index["STABBR"].cat.codes.to_numpy()
+    starts = np.flatnonzero(np.r_[True, np.diff(keys) != 0]) if len(keys) else np.array([], dtype="int64")
+    cellIndex = pd.DataFrame({"State": index["STABBR"].to_numpy()[starts].astype(str),
+                              "Year": index["Year"].astype("int64").to_numpy()[starts]})
+    sizes = np.diff(np.r_[starts, len(keys)])
+
+    frames = []
+    for attr in attrs:
+        values = np.asarray(store.column(attr), dtype="float64")
+        present = ~np.isnan(values)
+        filled = np.where(present, values, 0.0)
+        cells = cellIndex.copy()
+        cells.insert(0, "Attribute", attr)
+        if len(starts):
+            cells["size"] = sizes
+            cells["count"] = np.add.reduceat(present, starts)
+            cells["sum"] = np.add.reduceat(filled, starts)
+            cells["sumsq"] = np.add.reduceat(filled * filled, starts)
+            cells["min"] = np.fmin.reduceat(values, starts)
+            cells["max"] = np.fmax.reduceat(values, starts)
+        frames.append(cells)
+
+    # Every state and year is a cell, including those without any institutions
+    full = pd.MultiIndex.from_product([attrs, states, store.manifest["years"]], names=["Attribute", "State", "Year"])
+    cells = pd.concat(frames).set_index(["Attribute", "State", "Year"]).reindex(full, columns=CUBE_STATS)
+    cells[["size", "count", "sum", "sumsq"]] = cells[["size", "count", "sum", "sumsq"]].fillna(0)
+    cells[["size", "count"]] = cells[["size", "count"]].astype(int)
+    return cells.reset_index()
+
+
+# Builds or extends the aggregate cube with the given attributes, and returns it. Attributes are added to
+# the column store first, and the cube is recomputed from scratch when the yearly datasets change. The cube
+# is saved to the cache, so it is only computed once for every attribute
+def buildAggregateCube(keyAttributes, useCache=True):
+    """
+    Returns an AggregateCube holding at least the given attributes
+    @ params
+    keyAttributes - Required - An attribute name or list of attribute names
+    useCache      - Optional - Whether yearly datasets may be read from the Parquet cache
+    """
+    if not isinstance(keyAttributes, list):
+        keyAttributes = [keyAttributes]
+    folder = _aggregateCubeFolder()
+    manifestPath = os.path.join(folder, "cube.json")
+    cellsPath = os.path.join(folder, "cube.parquet")
+
+    # Processes building the cube at the same time wait for each other, and each file is replaced as a whole
+    with _fileLock(os.path.join(folder, "cube.lock")):
+        store = buildColumnStore(keyAttributes, useCache=useCache)
+
+        cells = None
+        if os.path.exists(manifestPath) and os.path.exists(cellsPath):
+            with open(manifestPath) as f:
+                manifest = json.load(f)
+            if manifest["sources"] == store.manifest["sources"]:
+                cells = pd.read_parquet(cellsPath)
+
+        known = set() if cells is None else set(cells["Attribute"])
+        missing = [attr for attr in keyAttributes if attr not in known]
+        if missing:
+            with stage("cube", columns=len(missing)) as record:
+                added = _computeCubeCells(store, missing)
+                cells = added if cells is None else pd.concat([cells, added], ignore_index=True)
+                record["rows"] = len(added)
+
+                manifest = {"sources": store.manifest["sources"], "attrs": list(dict.fromkeys(cells["Attribute"]))}
+                _writeAtomically(cellsPath, lambda path: cells.to_parquet(path, index=False))
+                _writeAtomically(manifestPath, lambda path: _writeJson(path, manifest))
+
+    return AggregateCube(cells)
+
+
+# Determines whether the persisted aggregate cube holds the given attributes and was computed from the
+# current yearly datasets, so that querying it needs no more than reading the cube
+def _aggregateCubeHolds(attrs):
+    manifestPath = os.path.join(_aggregateCubeFolder(), "cube.json")
+    if not os.path.exists(manifestPath):
+        return False
+    with open(manifestPath) as f:
+        manifest = json.load(f)
+    sources = {os.path.basename(path): _fileSignature(path) for path in scorecardFiles().values()}
+    return manifest["sources"] == sources and set(attrs) <= set(manifest["attrs"])
@@ -0,0 +1,28 @@
+import os
+import sys
+
+import pytest
+
+# The tests import the scorecard package from the root of the repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import scorecard  # noqa: E402
+from scorecard import config  # noqa: E402
+
+# Attributes and years of the synthetic datasets shared by the test modules
+ATTRS = ["CDR3", "TUITIONFEE_IN", "PBI"]
+YEARS = [2011, 2012, 2013]
+
+
+# Points the pipeline at synthetic yearly datasets and a cache in a temporary folder for the tests of a
+# module, and restores the configuration afterwards
+@pytest.fixture(scope="module")
+def synthetic(tmp_path_factory):
+    root = tmp_path_factory.mktemp("scorecard")
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(config, "SCORECARD_FOLDER", str(root / "datasets"))
+        patch.setattr(config, "CACHE_FOLDER", str(root / "Cache"))
+        scorecard.scorecardPanel.clear()
+        scorecard.generateSyntheticScorecard(config.SCORECARD_FOLDER, rows=400, years=YEARS, columns=ATTRS)
+        yield root
+        scorecard.scorecardPanel.clear()
@@ -0,0 +1,27 @@
+import pandas as pd
+import pytest
+
+import scorecard
+
+from conftest import ATTRS
+
+STREAMED_STATS = ["sum", "count", "size", "nulls", "mean", "min", "max"]
+
+
+# Chunks smaller than a yearly dataset, so that every state's statistics are combined across chunks
+@pytest.mark.parametrize("byYear, wide, options", [
+    (True, False, {"chunksize": 37}),
+    (False, False, {"chunksize": 37, "years": [2012, 2013]}),
+    (True, True, {"chunksize": 1000, "stateCodes": ["CA", "TX", "PR"]}),
+])
+def test_streamed_aggregate_matches_aggregate_by_state(synthetic, byYear, wide, options):
+    data = scorecard.readCollegeScorecardDatasets(ATTRS, years=options.get("years"),
+                                                  stateCodes=options.get("stateCodes"))
+    expected = scorecard.aggregateByState(data, ATTRS, STREAMED_STATS, byYear=byYear, wide=wide)
+    result = scorecard.streamAggregateByState(ATTRS, STREAMED_STATS, byYear=byYear, wide=wide, **options)
+    pd.testing.assert_frame_equal(result, expected, check_like=True, check_dtype=False, rtol=1e-5)
+
+
+def test_streamed_aggregate_rejects_statistics_it_cannot_combine(synthetic):
+    with pytest.raises(ValueError):
+        scorecard.streamAggregateByState(ATTRS, ["mean", "median"])
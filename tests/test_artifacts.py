@@ -0,0 +1,68 @@
+import os
+
+import pytest
+
+import scorecard
+from scorecard import config
+
+TARGETS = ["in and out tuition fees", "institution counts"]
+COLUMNS = ["TUITIONFEE_IN", "TUITIONFEE_OUT", "PBI", "CDR3", "UGDS_WHITE", "UGDS_BLACK", "UGDS_HISP", "UGDS_ASIAN",
+           "C150_4_WHITE", "C150_4_BLACK", "C150_4_HISP", "C150_4_ASIAN", "C150_4_NHPI", "C150_4_NRA", "C150_4_UNKN"]
+
+
+# Builds the tuition and institution count artifacts from synthetic datasets of 2012 and 2013, in a
+# temporary working folder
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(config, "SCORECARD_FOLDER", str(tmp_path / "datasets"))
+    monkeypatch.setattr(config, "CACHE_FOLDER", str(tmp_path / "Cache"))
+    monkeypatch.setattr(config, "OUTPUT_FOLDER", str(tmp_path / "Visualization Datasets"))
+    scorecard.scorecardPanel.clear()
+    scorecard.generateSyntheticScorecard(config.SCORECARD_FOLDER, rows=100, years=[2012, 2013], columns=COLUMNS)
+    assert scorecard.buildArtifacts(TARGETS) == TARGETS
+    yield tmp_path
+    scorecard.scorecardPanel.clear()
+
+
+def test_up_to_date_artifacts_are_not_rebuilt(project):
+    assert scorecard.buildArtifacts(TARGETS) == []
+    assert scorecard.buildArtifacts(TARGETS, force=True) == TARGETS
+
+
+def test_touching_a_dataset_does_not_make_artifacts_stale(project):
+    path = scorecard.scorecardFiles(years=[2013])[2013]
+    os.utime(path, (os.path.getatime(path), os.path.getmtime(path) + 60))
+    assert scorecard.buildArtifacts(TARGETS) == []
+
+
+def test_only_artifacts_reading_a_changed_year_are_rebuilt(project):
+    scorecard.generateSyntheticScorecard(config.SCORECARD_FOLDER, rows=120, years=[2012], columns=COLUMNS, seed=1)
+    assert scorecard.buildArtifacts(TARGETS) == ["institution counts"]
+
+
+def test_missing_or_edited_outputs_are_rebuilt(project):
+    path = scorecard.datasetPath("in and out tuition fees", "main")
+    os.remove(path)
+    assert scorecard.buildArtifacts(TARGETS) == ["in and out tuition fees"]
+
+    with open(path, "ab") as f:
+        f.write(b"\0")
+    assert scorecard.buildArtifacts(TARGETS) == ["in and out tuition fees"]
+    assert scorecard.buildArtifacts(TARGETS) == []
+
+
+def test_dependent_artifacts_are_rebuilt_with_their_dependencies(project, monkeypatch):
+    # Figures are written as empty files, since only whether they are rebuilt matters here
+    def renderFigures(specs):
+        os.makedirs("Figures", exist_ok=True)
+        for name in [name for spec in specs for name in spec["names"]]:
+            open(os.path.join("Figures", f"{name}.png"), "w").close()
+
+    monkeypatch.setitem(scorecard.artifacts.ARTIFACT_BUILDERS, "renderFigures", renderFigures)
+    figure = "one year attributes null count percent"
+    assert scorecard.buildArtifacts(figure) == ["null counts", figure]
+    assert scorecard.buildArtifacts(figure) == []
+
+    scorecard.generateSyntheticScorecard(config.SCORECARD_FOLDER, rows=120, years=[2013], columns=COLUMNS, seed=1)
+    assert scorecard.buildArtifacts(figure) == ["institution counts", "null counts", figure]
@@ -0,0 +1,31 @@
+import pandas as pd
+import pytest
+
+import scorecard
+
+
+# A sheet laid out like the datasets the pipeline writes: states by year, with year column labels
+def _sheet():
+    return pd.DataFrame({2012: [1.5, 2.5], 2013: [3.0, None]}, index=pd.Index(["AK", "AL"], name="State"))
+
+
+@pytest.mark.parametrize("format", list(scorecard.OUTPUT_WRITERS))
+def test_datasets_round_trip(tmp_path, format):
+    sheets = {"Sheet1": _sheet(), "Percent": _sheet() / 10}
+    paths = scorecard.writeDataset("null counts", sheets, format=format, folder=str(tmp_path))
+    assert len(paths) == (1 if format == "excel" else 2)
+
+    for sheet, frame in sheets.items():
+        expected = frame.reset_index()
+        result = scorecard.readDataset("null counts", sheet, format=format, folder=str(tmp_path))
+        pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+    # A dataset can also be read from the path of its file
+    main = scorecard.readDataset(scorecard.datasetPath("null counts", "Sheet1", format, str(tmp_path)), "Sheet1")
+    pd.testing.assert_frame_equal(main, sheets["Sheet1"].reset_index(), check_dtype=False)
+
+
+def test_datasets_fall_back_to_excel_workbooks(tmp_path):
+    scorecard.writeDataset("tuition", _sheet(), format="excel", folder=str(tmp_path))
+    result = scorecard.readDataset("tuition", format="parquet", folder=str(tmp_path))
+    pd.testing.assert_frame_equal(result, _sheet().reset_index(), check_dtype=False)
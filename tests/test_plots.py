@@ -0,0 +1,27 @@
+import numpy as np
+import pandas as pd
+
+import scorecard
+
+
+def test_quartiles_are_numbered_from_the_lowest_values():
+    data = pd.DataFrame({"x": [8.0, 1.0, np.nan, 4.0, 2.0, 7.0, 3.0, 6.0, 5.0]}, index=list("abcdefghi"))
+    bins = scorecard.assignBins(data, "x")
+    assert bins.index.tolist() == data.index.tolist()
+    assert bins.dtype == "Int64"
+    assert bins.isna().tolist() == data["x"].isna().tolist()
+    assert bins.dropna().tolist() == [4, 1, 2, 1, 4, 2, 3, 3]
+
+
+def test_values_equal_to_a_threshold_fall_in_the_lower_bin():
+    data = pd.DataFrame({"x": [0.0, 0.5, 1.0, 1.5, 2.0, 2.5]})
+    bins = scorecard.assignBins(data, "x", thresholds=[1.0, 2.0])
+    assert bins.tolist() == [1, 1, 1, 2, 2, 3]
+
+
+def test_quantiles_are_computed_within_groups():
+    data = pd.DataFrame({"Year": [2012] * 4 + [2013] * 4, "x": [1.0, 2.0, 3.0, 4.0, 10.0, 20.0, 30.0, 40.0]})
+    data = data.sample(frac=1, random_state=0)
+    bins = scorecard.assignBins(data, "x", bins=2, by="Year")
+    assert bins.index.tolist() == data.index.tolist()
+    assert bins.sort_index().tolist() == [1, 1, 2, 2, 1, 1, 2, 2]
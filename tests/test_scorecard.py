@@ -0,0 +1,201 @@
+import functools
+import multiprocessing
+import os
+import threading
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import scorecard
+from scorecard import cache, config, panel, plots
+
+from conftest import ATTRS
+
+# Random attributes with missing values, where the second chunk is centered far from the first so that
+# accumulators started on each chunk pick very different shifts
+def _chunks(seed=0):
+    rng = np.random.default_rng(seed)
+    chunks = []
+    for offset in [0.0, 1e4]:
+        values = rng.normal(offset, 1 + offset / 100, size=(300, 3))
+        values[:, 1] += 0.5 * values[:, 0]
+        values[rng.random(values.shape) < 0.3] = np.nan
+        chunks.append(pd.DataFrame(values, columns=["a", "b", "c"]))
+    return chunks
+
+
+def test_accumulator_merge_across_shifts():
+    first, second = _chunks()
+    whole = pd.concat([first, second], ignore_index=True)
+
+    merged = scorecard.CorrelationAccumulator(["a", "b", "c"]).update(first)
+    other = scorecard.CorrelationAccumulator(["a", "b", "c"]).update(second)
+    assert not np.allclose(merged.shift, other.shift)
+    merged.merge(other)
+
+    single = scorecard.CorrelationAccumulator(["a", "b", "c"]).update(whole)
+    pd.testing.assert_frame_equal(merged.counts(), whole.notna().astype(int).T.dot(whole.notna().astype(int)))
+    pd.testing.assert_frame_equal(merged.correlation(), whole.corr(), rtol=1e-9)
+    pd.testing.assert_frame_equal(merged.covariance(), whole.cov(), rtol=1e-9)
+    pd.testing.assert_frame_equal(merged.correlation(), single.correlation(), rtol=1e-9)
+
+    # Merging into an empty accumulator, or merging an empty one, leaves the statistics unchanged
+    empty = scorecard.CorrelationAccumulator(["a", "b", "c"]).merge(single)
+    empty.merge(scorecard.CorrelationAccumulator(["a", "b", "c"]))
+    pd.testing.assert_frame_equal(empty.covariance(), single.covariance())
+
+
+def test_accumulator_merge_rejects_other_attributes():
+    with pytest.raises(ValueError):
+        scorecard.CorrelationAccumulator(["a", "b"]).merge(scorecard.CorrelationAccumulator(["b", "a"]))
+
+
+def test_reads_do_not_depend_on_working_directory(synthetic, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    panel._readDataDictionary.cache_clear()
+    scorecard.scorecardPanel.clear()
+    data = scorecard.readCollegeScorecardDatasets(["CDR3"], years=[2013], useCache=False)
+    assert isinstance(data["INSTNM"].dtype, pd.CategoricalDtype)
+    assert data["CDR3"].dtype == "float32"
+    scorecard.scorecardPanel.clear()
+
+
+def test_missing_data_dictionary_is_an_error(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "DATA_DICTIONARY", str(tmp_path / "missing.csv"))
+    panel._readDataDictionary.cache_clear()
+    with pytest.raises(FileNotFoundError):
+        scorecard.scorecardDtypes(["INSTNM"])
+    monkeypatch.undo()
+    panel._readDataDictionary.cache_clear()
+
+
+def test_columns_missing_from_the_dictionary_keep_their_parsed_type():
+    data = pd.DataFrame({"INSTNM": ["A", "B"], "NOT_IN_DICTIONARY": ["x", "y"], "ALSO_NOT": [1.5, np.nan]})
+    data = panel._applyScorecardDtypes(data)
+    assert isinstance(data["INSTNM"].dtype, pd.CategoricalDtype)
+    assert isinstance(data["NOT_IN_DICTIONARY"].dtype, pd.CategoricalDtype)
+    assert data["ALSO_NOT"].dtype == "float64"
+
+
+@pytest.mark.parametrize("useCache", [False, True])
+def test_territories_are_dropped_without_warnings(synthetic, useCache):
+    scorecard.cacheCollegeScorecardDatasets()
+    scorecard.scorecardPanel.clear()
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        data = scorecard.readCollegeScorecardDatasets(["CDR3"], years=[2013], useCache=useCache)
+    assert data["STABBR"].dtype == pd.CategoricalDtype(scorecard.states)
+    assert data["STABBR"].notna().all()
+    raw = pd.read_csv(os.path.join(config.SCORECARD_FOLDER, "MERGED2013_14_PP.csv"), usecols=["STABBR"])
+    assert len(data) == raw["STABBR"].isin(scorecard.states).sum()
+    scorecard.scorecardPanel.clear()
+
+
+def test_panel_rereads_a_changed_dataset(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "SCORECARD_FOLDER", str(tmp_path / "datasets"))
+    monkeypatch.setattr(config, "CACHE_FOLDER", str(tmp_path / "Cache"))
+    panel = scorecard.ScorecardPanel()
+    scorecard.generateSyntheticScorecard(config.SCORECARD_FOLDER, rows=200, years=[2013], columns=ATTRS)
+    before = panel.read(["CDR3"])["CDR3"].mean()
+
+    scorecard.generateSyntheticScorecard(config.SCORECARD_FOLDER, rows=300, years=[2013], columns=ATTRS, seed=1)
+    after = panel.read(["CDR3"])
+    assert len(after) > 200 and after["CDR3"].mean() != before
+    # Only the columns of the current version of the file are kept
+    path = os.path.join(config.SCORECARD_FOLDER, "MERGED2013_14_PP.csv")
+    assert {key[1] for key in panel._columns} == {os.path.getsize(path)}
+
+
+def test_touched_dataset_is_hashed_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "SCORECARD_FOLDER", str(tmp_path / "datasets"))
+    monkeypatch.setattr(config, "CACHE_FOLDER", str(tmp_path / "Cache"))
+    scorecard.generateSyntheticScorecard(config.SCORECARD_FOLDER, rows=100, years=[2013], columns=ATTRS)
+    manifest = scorecard.cacheCollegeScorecardDatasets()
+    path = os.path.join(config.SCORECARD_FOLDER, "MERGED2013_14_PP.csv")
+    cachePath = manifest["MERGED2013_14_PP.csv"]["cache"]
+    # Only complete files are left in the cache folder
+    assert sorted(os.listdir(os.path.dirname(cachePath))) == ["data.parquet"]
+    assert not [file for file in os.listdir(cache._scorecardCacheFolder()) if file.endswith(".tmp")]
+
+    os.utime(path, (os.path.getatime(path), os.path.getmtime(path) + 60))
+    hashed = []
+    fileHash = cache._fileHash
+    monkeypatch.setattr(cache, "_fileHash", lambda path: hashed.append(path) or fileHash(path))
+    for _ in range(3):
+        scorecard.ScorecardPanel().read(["CDR3"])
+    assert hashed == [path]
+    assert cache._readScorecardManifest()["MERGED2013_14_PP.csv"]["mtime"] == os.path.getmtime(path)
+    assert scorecard.cacheCollegeScorecardDatasets()["MERGED2013_14_PP.csv"]["cache"] == cachePath
+
+
+def test_file_lock_is_held_for_as_long_as_its_owner_needs(tmp_path):
+    path = str(tmp_path / "build.lock")
+    events = []
+
+    def wait():
+        with cache._fileLock(path):
+            events.append("second")
+
+    with cache._fileLock(path):
+        waiting = threading.Thread(target=wait)
+        waiting.start()
+        # An old lock is not taken over while its owner still holds it
+        os.utime(path, (0, 0))
+        waiting.join(0.5)
+        assert waiting.is_alive()
+        events.append("first")
+    waiting.join()
+    assert events == ["first", "second"]
+    assert os.path.exists(path)
+
+
+def test_figure_artifacts_render_the_figures_they_output():
+    for name, artifact in scorecard.ARTIFACTS.items():
+        if artifact["function"] == "renderFigures":
+            names = [figure for spec in artifact["args"][0] for figure in spec["names"]]
+            assert [os.path.splitext(os.path.basename(path))[0] for path in artifact["outputs"]] == names
+    with pytest.raises(KeyError):
+        plots._figureSpec("no such figure")
+
+
+def test_spawned_workers_use_the_settings_of_their_parent(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "CACHE_FOLDER", str(tmp_path / "Cache"))
+    monkeypatch.setattr(cache, "ProcessPoolExecutor",
+                        functools.partial(ProcessPoolExecutor, mp_context=multiprocessing.get_context("spawn")))
+    folders = cache._mapParallel(cache._scorecardCacheFolder, [None, None], workers=2)
+    assert folders == [cache._scorecardCacheFolder()] * 2
+
+
+def test_figures_without_scorecard_data_do_not_ingest(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "SCORECARD_FOLDER", str(tmp_path / "datasets"))
+    monkeypatch.setattr(config, "CACHE_FOLDER", str(tmp_path / "Cache"))
+    scorecard.generateSyntheticScorecard(config.SCORECARD_FOLDER, rows=50, years=[2012, 2013], columns=ATTRS)
+    monkeypatch.setattr(plots, "_renderFigure", lambda spec, folder, formats: [])
+    cached = []
+    monkeypatch.setattr(plots, "cacheCollegeScorecardDatasets", lambda **kwargs: cached.append(kwargs["years"]))
+
+    scorecard.renderFigures([plots._figureSpec("one year attributes null count percent")], str(tmp_path))
+    assert cached == []
+    scorecard.renderFigures([plots._figureSpec("default rate 2013 historgram"),
+                             plots._figureSpec("box plot UGDS_SHARE")], str(tmp_path))
+    assert cached == [[2011, 2013]]
+
+
+def test_no_cache_reaches_every_job_that_reads_datasets(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "SCORECARD_FOLDER", str(tmp_path / "datasets"))
+    monkeypatch.setattr(config, "CACHE_FOLDER", str(tmp_path / "Cache"))
+    monkeypatch.setattr(config, "OUTPUT_FOLDER", str(tmp_path / "Visualization Datasets"))
+    os.makedirs(config.OUTPUT_FOLDER)
+    scorecard.generateSyntheticScorecard(config.SCORECARD_FOLDER, rows=50, years=[2012, 2013], columns=ATTRS)
+    scorecard.scorecardPanel.clear()
+
+    assert scorecard.main(["--no-cache", "count"]) == 0
+    assert scorecard.main(["--no-cache", "null-profile", "CDR3", "--years", "2013"]) == 0
+    assert not os.path.exists(cache._scorecardCacheFolder())
+    for job in ["render", "build"]:
+        with pytest.raises(SystemExit):
+            scorecard.main(["--no-cache", job])
+    scorecard.scorecardPanel.clear()
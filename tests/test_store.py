@@ -0,0 +1,72 @@
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import scorecard
+from scorecard import store
+
+from conftest import ATTRS
+
+
+@pytest.mark.parametrize("years, stateCodes", [
+    (None, None),
+    ([2012], None),
+    (None, ["CA", "NY", "WY"]),
+    ([2011, 2013], ["TX"]),
+    (2013, "AK"),
+    ([2013, 2011], ["DC", "AL", "PR"]),
+])
+def test_column_store_slices_match_panel(synthetic, years, stateCodes):
+    columnStore = scorecard.buildColumnStore(ATTRS)
+    data = scorecard.readCollegeScorecardDatasets(ATTRS, years=years, stateCodes=stateCodes)
+    data = data.assign(STABBR=data["STABBR"].astype(str)).sort_values(["Year", "STABBR", "UNITID"])
+
+    index = columnStore.index(years=years, stateCodes=stateCodes)
+    assert index["Year"].astype(int).tolist() == data["Year"].astype(int).tolist()
+    assert index["STABBR"].astype(str).tolist() == data["STABBR"].tolist()
+    assert index["UNITID"].astype(int).tolist() == data["UNITID"].astype(int).tolist()
+    for attr in ATTRS:
+        np.testing.assert_allclose(columnStore.column(attr, years=years, stateCodes=stateCodes),
+                                   data[attr].astype("float64").to_numpy(na_value=np.nan), rtol=1e-6)
+
+
+def test_column_store_rejects_text_attributes(synthetic):
+    with pytest.raises(ValueError):
+        scorecard.buildColumnStore(["INSTNM"])
+
+
+# Compares two state aggregates by value. Compact attribute types make the statistics differ in the last
+# digits between the cube and a groupby
+def _assertSameAggregate(result, expected):
+    pd.testing.assert_frame_equal(result, expected, check_like=True, rtol=1e-5)
+
+
+def test_cube_query_matches_aggregate_by_state(synthetic):
+    stats = ["mean", "std", "count", "size", "nulls", "nullPercent", "min", "max"]
+    cube = scorecard.buildAggregateCube(ATTRS)
+    data = scorecard.readCollegeScorecardDatasets(ATTRS)
+
+    for byYear, years in [(True, None), (False, None), (False, [2013])]:
+        expected = scorecard.aggregateByState(data if years is None else data[data["Year"].isin(years)],
+                                              ATTRS, stats, byYear=byYear)
+        result = cube.query(ATTRS, stats, byYear=byYear, years=years)
+        _assertSameAggregate(result, expected)
+
+    wide = cube.query(ATTRS, "mean", byYear=False, years=[2013], wide=True)
+    expected = scorecard.aggregateByState(data[data["Year"] == 2013], ATTRS, "mean", byYear=False, wide=True)
+    _assertSameAggregate(wide, expected)
+
+
+def test_year_restricted_statistics_match_with_and_without_cube(synthetic):
+    scorecard.buildAggregateCube(ATTRS)
+    warm = scorecard.queryStateStatistics(ATTRS, ["mean", "size", "nullPercent"], byYear=False, years=[2012])
+
+    for folder in [store._columnStoreFolder(), store._aggregateCubeFolder()]:
+        shutil.rmtree(folder)
+    scorecard.scorecardPanel.clear()
+    cold = scorecard.queryStateStatistics(ATTRS, ["mean", "size", "nullPercent"], byYear=False, years=[2012])
+    assert not os.path.exists(store._aggregateCubeFolder())
+    _assertSameAggregate(cold, warm)